@@ -8,10 +8,14 @@ setup(
         "sqlalchemy==2.0.27",
         "requests==2.31.0",
         "pandas==2.2.0",
+        "pyarrow==15.0.0",
         "numpy==1.26.4",
         "beautifulsoup4==4.12.3",
+        "orjson==3.8.3",
+        "ijson==3.2.3",
         "python-dotenv==1.0.1",
-        "openpyxl==3.1.2",
+        "python-calamine==0.1.7",
+        "XlsxWriter==3.1.9",
         "PyQt6==6.6.1",
         "PyQt6-Qt6==6.6.1",
         "PyQt6-sip==13.6.0",
@@ -1,14 +1,25 @@
 """
 Módulo responsável pelas configurações do sistema.
 """
+import os
 from pathlib import Path
 
+from dotenv import load_dotenv
+
 # Diretórios
 DIR_BASE = Path(__file__).parent.parent.parent
 DIR_DATA = DIR_BASE / "data"
 DIR_OUTPUT = DIR_DATA / "output"
 DIR_INPUT = DIR_DATA / "input"
 
+# Variáveis do arquivo .env (não sobrescrevem as já definidas no ambiente)
+load_dotenv(DIR_BASE / ".env")
+
+# Configurações do SharePoint
+SHAREPOINT_SITE_URL = os.getenv("SHAREPOINT_SITE_URL", "http://10.1.1.82:1206")
+SHAREPOINT_USERNAME = os.getenv("SHAREPOINT_USERNAME", "")
+SHAREPOINT_PASSWORD = os.getenv("SHAREPOINT_PASSWORD", "")
+
 # Configurações de Excel
 ORDEM_COLUNAS = [
     "Tipo",
@@ -25,6 +36,21 @@ ORDEM_COLUNAS = [
     "Spg e Ensaio"
 ]
 
+# Colunas das planilhas geradas, na ordem em que são escritas
+COLUNAS_SAIDA = (
+    "SPG",
+    "Ensaio",
+    "Instrumento",
+    "Tag",
+    "Localização",
+    "Faixa",
+    "Unidade",
+    "Classe",
+    "Última Calibração",
+    "Próxima Calibração",
+    "Status"
+)
+
 # Configurações de formatação
 FORMATO_TITULO = {
     "font": "Arial",
@@ -1,11 +1,68 @@
 """
 Módulo responsável pelo gerenciamento de dados.
 """
+import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Colunas obrigatórias do arquivo de entrada
+COLUNAS_ENTRADA = frozenset({
+    "SPG",
+    "Ensaio",
+    "Instrumento",
+    "Tag",
+    "Localização",
+    "Faixa",
+    "Unidade",
+    "Classe",
+    "Última Calibração",
+    "Próxima Calibração",
+    "Status"
+})
+
+# Colunas de baixa cardinalidade lidas como categorias
+COLUNAS_CATEGORICAS = ("SPG", "Ensaio", "Unidade", "Classe", "Status")
+
+
+def _converter_datas(serie: pd.Series) -> pd.Series:
+    """
+    Converte uma coluna de datas digitadas em ISO 8601 ou no padrão brasileiro.
+    
+    Valores em ISO 8601 (incluindo as células de data do Excel) são convertidos
+    de uma vez; os demais são lidos individualmente com o dia primeiro
+    ("05/03/2024" é 5 de março). Textos que não representam uma data viram NaT
+    e são contados em um aviso no log.
+    
+    Args:
+        serie: Coluna com as datas.
+        
+    Returns:
+        Coluna convertida para datetime.
+    """
+    datas = pd.to_datetime(serie, format="ISO8601", errors="coerce")
+    
+    # Células vazias ou só com espaços são ausência de data, não erro
+    preenchidas = serie.notna() & (serie.astype(str).str.strip() != "")
+    pendentes = datas.isna() & preenchidas
+    if pendentes.any():
+        datas[pendentes] = pd.to_datetime(
+            serie[pendentes], format="mixed", dayfirst=True, errors="coerce"
+        )
+        invalidas = int((datas.isna() & preenchidas).sum())
+        if invalidas:
+            logger.warning(
+                "Coluna '%s': %d valor(es) não reconhecido(s) como data",
+                serie.name, invalidas
+            )
+    
+    return datas
+
 
 class DataManager:
     """Classe responsável pelo gerenciamento de dados."""
@@ -13,13 +70,20 @@ class DataManager:
     def __init__(self):
         """Inicializa o gerenciador de dados."""
         self.dados: Optional[pd.DataFrame] = None
+        self._spgs: List[str] = []
+        self._ensaios_por_spg: Dict[str, List[str]] = {}
+        self._linhas_por_spg_ensaio: Dict[Tuple[str, str], np.ndarray] = {}
+        # Arquivo de onde vieram os dados atuais: (caminho absoluto, mtime em ns)
+        self._origem: Optional[Tuple[Path, int]] = None
     
     def carregar_dados(self, arquivo_excel: Path) -> pd.DataFrame:
         """
-        Carrega os dados do arquivo Excel.
+        Carrega os dados do arquivo Excel ou Parquet.
+        
+        Os dados anteriores só são substituídos quando a carga termina sem erro.
         
         Args:
-            arquivo_excel: Caminho do arquivo Excel.
+            arquivo_excel: Caminho do arquivo Excel ou Parquet.
             
         Returns:
             DataFrame com os dados carregados.
@@ -30,32 +94,75 @@ class DataManager:
         if not arquivo_excel.exists():
             raise ValueError(f"Arquivo não encontrado: {arquivo_excel}")
         
-        # Carrega os dados
-        self.dados = pd.read_excel(arquivo_excel)
+        # Lido antes do arquivo: uma alteração durante a leitura força nova carga
+        origem = (arquivo_excel.resolve(), arquivo_excel.stat().st_mtime_ns)
+        
+        if arquivo_excel.suffix.lower() == ".parquet":
+            # Arquivo gerado a partir do SharePoint: leitura colunar direta
+            dados = pd.read_parquet(arquivo_excel, engine="pyarrow")
+            dados = dados[[coluna for coluna in dados.columns if coluna in COLUNAS_ENTRADA]].astype(
+                {coluna: "category" for coluna in COLUNAS_CATEGORICAS if coluna in dados.columns}
+            )
+        else:
+            # Carrega apenas as colunas usadas, com o leitor calamine (Rust) e
+            # colunas de baixa cardinalidade como categorias
+            dados = pd.read_excel(
+                arquivo_excel,
+                engine="calamine",
+                usecols=lambda coluna: coluna in COLUNAS_ENTRADA,
+                dtype=dict.fromkeys(COLUNAS_CATEGORICAS, "category")
+            )
         
         # Verifica as colunas necessárias
-        colunas_necessarias = [
-            "SPG",
-            "Ensaio",
-            "Instrumento",
-            "Tag",
-            "Localização",
-            "Faixa",
-            "Unidade",
-            "Classe",
-            "Última Calibração",
-            "Próxima Calibração",
-            "Status"
-        ]
-        
-        colunas_faltantes = [col for col in colunas_necessarias if col not in self.dados.columns]
+        colunas_faltantes = COLUNAS_ENTRADA.difference(dados.columns)
         if colunas_faltantes:
             raise ValueError(
-                f"Colunas necessárias não encontradas no arquivo: {', '.join(colunas_faltantes)}"
+                f"Colunas necessárias não encontradas no arquivo: {', '.join(sorted(colunas_faltantes))}"
             )
         
+        # Converte as datas de calibração uma única vez
+        for coluna in ("Última Calibração", "Próxima Calibração"):
+            dados[coluna] = _converter_datas(dados[coluna])
+        
+        # Indexa os ensaios por SPG para as consultas da interface
+        ensaios_por_spg = {
+            spg: sorted(grupo["Ensaio"].unique().tolist())
+            for spg, grupo in dados.groupby("SPG", sort=False, observed=True)
+        }
+        
+        # Posições das linhas de cada par (SPG, ensaio), na ordem original
+        linhas_por_spg_ensaio = dados.groupby(
+            ["SPG", "Ensaio"], sort=False, observed=True
+        ).indices
+        
+        # Carga concluída: substitui os dados e os índices de uma vez
+        self.dados = dados
+        self._ensaios_por_spg = ensaios_por_spg
+        # As categorias inferidas na leitura já vêm ordenadas
+        self._spgs = dados["SPG"].cat.categories.tolist()
+        self._linhas_por_spg_ensaio = linhas_por_spg_ensaio
+        self._origem = origem
+        
         return self.dados
     
+    def possui_dados_de(self, arquivo: Path) -> bool:
+        """
+        Indica se os dados carregados vieram da versão atual de um arquivo.
+        
+        Args:
+            arquivo: Caminho do arquivo Excel ou Parquet.
+            
+        Returns:
+            True se os dados foram carregados desse arquivo e ele não foi
+            alterado desde então.
+        """
+        if self.dados is None or self._origem is None:
+            return False
+        try:
+            return self._origem == (arquivo.resolve(), arquivo.stat().st_mtime_ns)
+        except OSError:
+            return False
+    
     def obter_spgs(self) -> List[str]:
         """
         Obtém a lista de SPGs disponíveis.
@@ -69,7 +176,8 @@ class DataManager:
         if self.dados is None:
             raise ValueError("Dados não carregados")
         
-        return sorted(self.dados["SPG"].unique().tolist())
+        # Cópia: alterações feitas pelo chamador não afetam o cache
+        return list(self._spgs)
     
     def obter_ensaios(self, spg: str) -> List[str]:
         """
@@ -87,9 +195,8 @@ class DataManager:
         if self.dados is None:
             raise ValueError("Dados não carregados")
         
-        return sorted(
-            self.dados[self.dados["SPG"] == spg]["Ensaio"].unique().tolist()
-        )
+        # Cópia: alterações feitas pelo chamador não afetam o cache
+        return list(self._ensaios_por_spg.get(spg, ()))
     
     def filtrar_por_spg_ensaio(
         self,
@@ -111,10 +218,15 @@ class DataManager:
         Raises:
             ValueError: Se não houver dados para o SPG e ensaio selecionados.
         """
-        dados_filtrados = dados[
-            (dados["SPG"] == spg) &
-            (dados["Ensaio"] == ensaio)
-        ]
+        if dados is self.dados:
+            # Consulta direta no índice montado em carregar_dados
+            linhas = self._linhas_por_spg_ensaio.get((spg, ensaio))
+            dados_filtrados = dados.iloc[linhas] if linhas is not None else dados.iloc[:0]
+        else:
+            dados_filtrados = dados[
+                (dados["SPG"] == spg) &
+                (dados["Ensaio"] == ensaio)
+            ]
         
         if dados_filtrados.empty:
             raise ValueError(
@@ -1,14 +1,49 @@
 """
 Módulo responsável pela geração das planilhas Excel.
 """
+import re
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Sequence, Set, Tuple
 
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Border, Font, PatternFill
-from openpyxl.utils import get_column_letter
+import xlsxwriter
+
+from src.core.config import COLUNAS_SAIDA
+
+# Limites da largura automática das colunas (em caracteres)
+LARGURA_MINIMA = 10
+LARGURA_MAXIMA = 30
+
+# Limite do Excel para nomes de aba e caracteres proibidos neles
+TAMANHO_MAXIMO_ABA = 31
+_CARACTERES_INVALIDOS_ABA = re.compile(r"[\[\]:*?/\\]")
+
+
+def _nome_aba_unico(nome: str, usados: Set[str]) -> str:
+    """
+    Gera um nome de aba válido e ainda não usado no workbook.
+    
+    Remove os caracteres proibidos pelo Excel, limita o nome a 31 caracteres
+    e, se já existir uma aba com o mesmo nome (sem diferenciar maiúsculas),
+    acrescenta um sufixo "~2", "~3", ...
+    
+    Args:
+        nome: Nome desejado para a aba.
+        usados: Nomes já usados, em minúsculas; o nome gerado é adicionado.
+        
+    Returns:
+        Nome da aba.
+    """
+    base = _CARACTERES_INVALIDOS_ABA.sub("", nome).strip().strip("'") or "Ensaio"
+    candidato = base[:TAMANHO_MAXIMO_ABA]
+    contador = 2
+    while candidato.lower() in usados:
+        sufixo = f"~{contador}"
+        candidato = base[:TAMANHO_MAXIMO_ABA - len(sufixo)] + sufixo
+        contador += 1
+    usados.add(candidato.lower())
+    return candidato
 
 
 class ExcelManager:
@@ -25,122 +60,283 @@ class ExcelManager:
         self.pasta_saida.mkdir(parents=True, exist_ok=True)
         
         # Cores
-        self.cor_azul = "1F4E78"
-        self.cor_verde = "00B050"
-        self.cor_vermelho = "FF0000"
-        self.cor_amarelo = "FFC000"
-        
-        # Fontes
-        self.fonte_titulo = Font(name="Arial", size=14, bold=True)
-        self.fonte_cabecalho = Font(name="Arial", size=11, bold=True, color="FFFFFF")
-        self.fonte_dados = Font(name="Arial", size=10)
-        
-        # Preenchimentos
-        self.preenchimento_cabecalho = PatternFill(
-            start_color=self.cor_azul,
-            end_color=self.cor_azul,
-            fill_type="solid"
-        )
-        self.preenchimento_verde = PatternFill(
-            start_color=self.cor_verde,
-            end_color=self.cor_verde,
-            fill_type="solid"
-        )
-        self.preenchimento_vermelho = PatternFill(
-            start_color=self.cor_vermelho,
-            end_color=self.cor_vermelho,
-            fill_type="solid"
-        )
-        self.preenchimento_amarelo = PatternFill(
-            start_color=self.cor_amarelo,
-            end_color=self.cor_amarelo,
-            fill_type="solid"
-        )
+        self.cor_azul = "#1F4E78"
+        self.cor_verde = "#00B050"
+        self.cor_vermelho = "#FF0000"
+        self.cor_amarelo = "#FFC000"
         
-        # Alinhamentos
-        self.alinhamento_central = Alignment(
-            horizontal="center",
-            vertical="center",
-            wrap_text=True
-        )
+        # Propriedades dos formatos (instanciados uma vez por workbook)
+        self.formato_titulo = {
+            "font_name": "Arial",
+            "font_size": 14,
+            "bold": True,
+            "align": "center",
+            "valign": "vcenter",
+            "text_wrap": True
+        }
+        self.formato_cabecalho = {
+            "font_name": "Arial",
+            "font_size": 11,
+            "bold": True,
+            "font_color": "#FFFFFF",
+            "bg_color": self.cor_azul,
+            "align": "center",
+            "valign": "vcenter",
+            "text_wrap": True,
+            "border": 1
+        }
+        self.formato_dados = {
+            "font_name": "Arial",
+            "font_size": 10,
+            "align": "center",
+            "valign": "vcenter",
+            "text_wrap": True,
+            "border": 1
+        }
+        self.formato_data = {**self.formato_dados, "num_format": "dd/mm/yyyy"}
+    
+    def _criar_formatos(self, wb: xlsxwriter.Workbook) -> Dict[str, Any]:
+        """
+        Cria os formatos usados nas planilhas.
         
-        # Bordas
-        self.borda_fina = Border(
-            left=Border(style="thin"),
-            right=Border(style="thin"),
-            top=Border(style="thin"),
-            bottom=Border(style="thin")
-        )
+        Args:
+            wb: Workbook onde os formatos serão registrados.
+            
+        Returns:
+            Dicionário com os formatos criados.
+        """
+        return {
+            "titulo": wb.add_format(self.formato_titulo),
+            "cabecalho": wb.add_format(self.formato_cabecalho),
+            "dados": wb.add_format(self.formato_dados),
+            "data": wb.add_format(self.formato_data),
+            "data_vermelho": wb.add_format({**self.formato_data, "bg_color": self.cor_vermelho}),
+            "data_amarelo": wb.add_format({**self.formato_data, "bg_color": self.cor_amarelo}),
+            "vermelho": wb.add_format({**self.formato_dados, "bg_color": self.cor_vermelho}),
+            "verde": wb.add_format({"bg_color": self.cor_verde}),
+            "vermelho_status": wb.add_format({"bg_color": self.cor_vermelho})
+        }
     
-    def criar_planilha_geral(self, dados: pd.DataFrame) -> Path:
+    @staticmethod
+    def _valor_celula(valor: Any) -> Any:
         """
-        Cria a planilha geral com todos os instrumentos.
+        Converte o valor do DataFrame para um tipo aceito pelo xlsxwriter.
+        
+        Args:
+            valor: Valor da célula.
+            
+        Returns:
+            Valor convertido (None para valores ausentes).
+        """
+        if valor is None or (not isinstance(valor, str) and pd.isna(valor)):
+            return None
+        if isinstance(valor, pd.Timestamp):
+            return valor.to_pydatetime()
+        return valor
+    
+    @staticmethod
+    def _larguras_colunas(dados: pd.DataFrame, colunas: Sequence[str]) -> List[int]:
+        """
+        Calcula a largura de cada coluna a partir do maior texto exibido.
         
         Args:
             dados: DataFrame com os dados dos instrumentos.
+            colunas: Nomes dos cabeçalhos, na ordem das colunas.
             
         Returns:
-            Caminho do arquivo Excel gerado.
+            Lista com a largura de cada coluna.
         """
-        # Cria o arquivo Excel
-        nome_arquivo = "Relação de Instrumentos.xlsx"
-        caminho_arquivo = self.pasta_saida / nome_arquivo
+        larguras = []
+        for indice, nome in enumerate(colunas):
+            tamanho = len(nome)
+            if indice < dados.shape[1] and not dados.empty:
+                serie = dados.iloc[:, indice]
+                if pd.api.types.is_datetime64_any_dtype(serie):
+                    tamanho = max(tamanho, len("dd/mm/yyyy"))
+                else:
+                    tamanho = max(tamanho, int(serie.astype(str).str.len().max()))
+            larguras.append(min(LARGURA_MAXIMA, max(LARGURA_MINIMA, tamanho + 2)))
+        return larguras
+    
+    def _novo_workbook(self, caminho_arquivo: Path) -> Tuple[xlsxwriter.Workbook, Dict[str, Any]]:
+        """
+        Cria um workbook em modo streaming com os formatos registrados.
         
-        # Cria o workbook e a planilha
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Geral"
+        Args:
+            caminho_arquivo: Caminho do arquivo Excel a ser gerado.
+            
+        Returns:
+            Tupla com o workbook e o dicionário de formatos.
+        """
+        wb = xlsxwriter.Workbook(str(caminho_arquivo), {"constant_memory": True})
+        return wb, self._criar_formatos(wb)
+    
+    def _escrever_planilha_geral(
+        self,
+        wb: xlsxwriter.Workbook,
+        formatos: Dict[str, Any],
+        dados: pd.DataFrame,
+        nome_planilha: str = "Geral"
+    ) -> None:
+        """
+        Escreve a planilha geral em um workbook já aberto.
+        
+        Args:
+            wb: Workbook de destino.
+            formatos: Formatos registrados no workbook.
+            dados: DataFrame com os dados dos instrumentos.
+            nome_planilha: Nome da aba.
+        """
+        ws = wb.add_worksheet(nome_planilha)
+        
+        formato_dados = formatos["dados"]
+        formato_data = formatos["data"]
+        
+        # Ajusta as larguras e o formato (fonte, bordas) das colunas
+        for col, largura in enumerate(self._larguras_colunas(dados, COLUNAS_SAIDA)):
+            ws.set_column(col, col, largura, formato_dados)
         
         # Adiciona o título
-        ws.merge_cells("A1:K1")
-        ws["A1"] = "Relação de Instrumentos"
-        ws["A1"].font = self.fonte_titulo
-        ws["A1"].alignment = self.alinhamento_central
+        ws.merge_range(0, 0, 0, len(COLUNAS_SAIDA) - 1, "Relação de Instrumentos", formatos["titulo"])
         
         # Adiciona os cabeçalhos
-        colunas = [
-            "SPG",
-            "Ensaio",
-            "Instrumento",
-            "Tag",
-            "Localização",
-            "Faixa",
-            "Unidade",
-            "Classe",
-            "Última Calibração",
-            "Próxima Calibração",
-            "Status"
-        ]
-        
-        for col, nome in enumerate(colunas, 1):
-            celula = ws.cell(row=2, column=col)
-            celula.value = nome
-            celula.font = self.fonte_cabecalho
-            celula.fill = self.preenchimento_cabecalho
-            celula.alignment = self.alinhamento_central
-            celula.border = self.borda_fina
-        
-        # Adiciona os dados
-        for row, (_, linha) in enumerate(dados.iterrows(), 3):
-            for col, valor in enumerate(linha, 1):
-                celula = ws.cell(row=row, column=col)
-                celula.value = valor
-                celula.font = self.fonte_dados
-                celula.alignment = self.alinhamento_central
-                celula.border = self.borda_fina
-        
-        # Ajusta as larguras das colunas
-        for col in range(1, len(colunas) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 15
+        ws.write_row(1, 0, COLUNAS_SAIDA, formatos["cabecalho"])
+        
+        # Adiciona os dados (as células herdam o formato da coluna)
+        for row, linha in enumerate(dados.itertuples(index=False, name=None), 2):
+            for col, valor in enumerate(linha):
+                valor = self._valor_celula(valor)
+                if isinstance(valor, datetime):
+                    ws.write_datetime(row, col, valor, formato_data)
+                else:
+                    ws.write(row, col, valor)
         
         # Adiciona filtros
-        ws.auto_filter.ref = f"A2:K{len(dados) + 2}"
+        ws.autofilter(1, 0, len(dados) + 1, len(COLUNAS_SAIDA) - 1)
         
         # Congela o cabeçalho
-        ws.freeze_panes = "A3"
+        ws.freeze_panes(2, 0)
+    
+    def _escrever_planilha_ensaio(
+        self,
+        wb: xlsxwriter.Workbook,
+        formatos: Dict[str, Any],
+        dados: pd.DataFrame,
+        spg: str,
+        ensaio: str,
+        nome_planilha: str = "Instrumentos"
+    ) -> None:
+        """
+        Escreve a planilha de um ensaio em um workbook já aberto.
+        
+        Args:
+            wb: Workbook de destino.
+            formatos: Formatos registrados no workbook.
+            dados: DataFrame com os dados dos instrumentos do ensaio.
+            spg: SPG do ensaio.
+            ensaio: Nome do ensaio.
+            nome_planilha: Nome da aba.
+        """
+        ws = wb.add_worksheet(nome_planilha)
+        
+        formato_dados = formatos["dados"]
+        formato_data = formatos["data"]
+        
+        # Ajusta as larguras e o formato (fonte, bordas) das colunas
+        for col, largura in enumerate(self._larguras_colunas(dados, COLUNAS_SAIDA)):
+            ws.set_column(col, col, largura, formato_data if col in (8, 9) else formato_dados)
+        
+        # Adiciona o título
+        ws.merge_range(
+            0, 0, 0, len(COLUNAS_SAIDA) - 1,
+            f"Relação de Instrumentos - {spg} - {ensaio}",
+            formatos["titulo"]
+        )
+        
+        # Adiciona os cabeçalhos
+        ws.write_row(1, 0, COLUNAS_SAIDA, formatos["cabecalho"])
+        
+        # Adiciona os dados (somente as células destacadas recebem formato próprio)
+        formato_vermelho = formatos["vermelho"]
+        formato_data_vermelho = formatos["data_vermelho"]
+        formato_data_amarelo = formatos["data_amarelo"]
+        
+        # Classifica as datas de calibração de uma vez, antes da escrita
+        agora = pd.Timestamp.now()
+        calibracoes = []
+        for col in (8, 9):
+            datas = pd.to_datetime(dados.iloc[:, col], errors="coerce")
+            calibracoes.append((
+                col,
+                datas.astype(object).to_numpy(),
+                datas.isna().to_numpy(),
+                (datas < agora).to_numpy(),
+                ((datas - agora).dt.days <= 30).to_numpy()
+            ))
+        
+        for i, linha in enumerate(dados.itertuples(index=False, name=None)):
+            row = i + 2
+            for col in range(8):
+                valor = self._valor_celula(linha[col])
+                if isinstance(valor, datetime):
+                    ws.write_datetime(row, col, valor, formato_data)
+                else:
+                    ws.write(row, col, valor)
+            
+            # Aplica formatação condicional nas colunas de calibração
+            for col, datas, ausente, vencida, alerta in calibracoes:
+                if ausente[i]:
+                    ws.write_blank(row, col, None, formato_vermelho)
+                elif vencida[i]:
+                    ws.write_datetime(row, col, datas[i], formato_data_vermelho)
+                elif alerta[i]:
+                    ws.write_datetime(row, col, datas[i], formato_data_amarelo)
+                else:
+                    ws.write_datetime(row, col, datas[i])
+            
+            # Coluna Status (destacada pela formatação condicional)
+            ws.write(row, 10, self._valor_celula(linha[10]))
+        
+        # Formatação condicional da coluna Status
+        ultima_linha = len(dados) + 1
+        ws.conditional_format(2, 10, ultima_linha, 10, {
+            "type": "cell",
+            "criteria": "==",
+            "value": '"ATIVO"',
+            "format": formatos["verde"]
+        })
+        ws.conditional_format(2, 10, ultima_linha, 10, {
+            "type": "cell",
+            "criteria": "==",
+            "value": '"BLOQUEADO"',
+            "format": formatos["vermelho_status"]
+        })
+        
+        # Adiciona filtros
+        ws.autofilter(1, 0, ultima_linha, len(COLUNAS_SAIDA) - 1)
+        
+        # Congela o cabeçalho
+        ws.freeze_panes(2, 0)
+    
+    def criar_planilha_geral(self, dados: pd.DataFrame) -> Path:
+        """
+        Cria a planilha geral com todos os instrumentos.
+        
+        Args:
+            dados: DataFrame com os dados dos instrumentos.
+            
+        Returns:
+            Caminho do arquivo Excel gerado.
+        """
+        # Cria o arquivo Excel
+        nome_arquivo = "Relação de Instrumentos.xlsx"
+        caminho_arquivo = self.pasta_saida / nome_arquivo
+        
+        wb, formatos = self._novo_workbook(caminho_arquivo)
+        self._escrever_planilha_geral(wb, formatos, dados)
         
         # Salva o arquivo
-        wb.save(caminho_arquivo)
+        wb.close()
         
         return caminho_arquivo
     
@@ -165,77 +361,68 @@ class ExcelManager:
         nome_arquivo = f"[{spg}] {ensaio} - Relação de Instrumentos.xlsx"
         caminho_arquivo = self.pasta_saida / nome_arquivo
         
-        # Cria o workbook e a planilha
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Instrumentos"
+        wb, formatos = self._novo_workbook(caminho_arquivo)
+        self._escrever_planilha_ensaio(wb, formatos, dados, spg, ensaio)
         
-        # Adiciona o título
-        ws.merge_cells("A1:K1")
-        ws["A1"] = f"Relação de Instrumentos - {spg} - {ensaio}"
-        ws["A1"].font = self.fonte_titulo
-        ws["A1"].alignment = self.alinhamento_central
+        # Salva o arquivo
+        wb.close()
         
-        # Adiciona os cabeçalhos
-        colunas = [
-            "SPG",
-            "Ensaio",
-            "Instrumento",
-            "Tag",
-            "Localização",
-            "Faixa",
-            "Unidade",
-            "Classe",
-            "Última Calibração",
-            "Próxima Calibração",
-            "Status"
-        ]
-        
-        for col, nome in enumerate(colunas, 1):
-            celula = ws.cell(row=2, column=col)
-            celula.value = nome
-            celula.font = self.fonte_cabecalho
-            celula.fill = self.preenchimento_cabecalho
-            celula.alignment = self.alinhamento_central
-            celula.border = self.borda_fina
-        
-        # Adiciona os dados
-        for row, (_, linha) in enumerate(dados.iterrows(), 3):
-            for col, valor in enumerate(linha, 1):
-                celula = ws.cell(row=row, column=col)
-                celula.value = valor
-                celula.font = self.fonte_dados
-                celula.alignment = self.alinhamento_central
-                celula.border = self.borda_fina
-                
-                # Aplica formatação condicional
-                if col == 11:  # Coluna Status
-                    if valor == "ATIVO":
-                        celula.fill = self.preenchimento_verde
-                    elif valor == "BLOQUEADO":
-                        celula.fill = self.preenchimento_vermelho
-                
-                elif col in [9, 10]:  # Colunas de calibração
-                    if pd.isna(valor):
-                        celula.fill = self.preenchimento_vermelho
-                    else:
-                        data = pd.to_datetime(valor)
-                        if data < datetime.now():
-                            celula.fill = self.preenchimento_vermelho
-                        elif (data - datetime.now()).days <= 30:
-                            celula.fill = self.preenchimento_amarelo
-        
-        # Ajusta as larguras das colunas
-        for col in range(1, len(colunas) + 1):
-            ws.column_dimensions[get_column_letter(col)].width = 15
+        return caminho_arquivo
+    
+    def criar_planilhas(
+        self,
+        dados: pd.DataFrame,
+        spgs_ensaios: List[Tuple[str, str]]
+    ) -> Path:
+        """
+        Cria um único arquivo com a planilha geral e uma aba por ensaio.
         
-        # Adiciona filtros
-        ws.auto_filter.ref = f"A2:K{len(dados) + 2}"
+        Args:
+            dados: DataFrame com os dados de todos os instrumentos.
+            spgs_ensaios: Pares (SPG, ensaio) que devem ganhar uma aba própria.
+            
+        Returns:
+            Caminho do arquivo Excel gerado.
+            
+        Raises:
+            ValueError: Se não houver dados para algum SPG e ensaio informados.
+        """
+        # Cria o arquivo Excel
+        nome_arquivo = "Relação de Instrumentos - Geral e Ensaios.xlsx"
+        caminho_arquivo = self.pasta_saida / nome_arquivo
         
-        # Congela o cabeçalho
-        ws.freeze_panes = "A3"
+        # Posições das linhas de cada par (SPG, ensaio)
+        linhas_por_par = dados.groupby(["SPG", "Ensaio"], sort=False, observed=True).indices
+        
+        # Valida os pares e define os nomes das abas antes de criar o arquivo
+        usados = {"geral"}
+        abas = []
+        for spg, ensaio in spgs_ensaios:
+            linhas = linhas_por_par.get((spg, ensaio))
+            if linhas is None:
+                raise ValueError(
+                    f"Não há instrumentos para o SPG '{spg}' e ensaio '{ensaio}'"
+                )
+            abas.append((spg, ensaio, linhas, _nome_aba_unico(f"{spg} {ensaio}", usados)))
+        
+        wb, formatos = self._novo_workbook(caminho_arquivo)
+        try:
+            self._escrever_planilha_geral(wb, formatos, dados)
+            
+            for spg, ensaio, linhas, nome_planilha in abas:
+                self._escrever_planilha_ensaio(
+                    wb, formatos, dados.iloc[linhas], spg, ensaio, nome_planilha
+                )
+        except BaseException:
+            # Não deixa um arquivo incompleto na pasta de saída
+            try:
+                wb.close()
+            except Exception:
+                pass
+            caminho_arquivo.unlink(missing_ok=True)
+            raise
         
         # Salva o arquivo
-        wb.save(caminho_arquivo)
+        wb.close()
         
-        return caminho_arquivo 
\ No newline at end of file
+        return caminho_arquivo
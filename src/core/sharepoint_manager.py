@@ -2,20 +2,28 @@
 Módulo responsável pela comunicação com o SharePoint.
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import orjson
 import pandas as pd
 import numpy as np
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+import lxml.html
+from lxml import etree
 import re
-from datetime import datetime
+from datetime import date, datetime
 import logging
+import threading
+import time
 from functools import lru_cache
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional, Union, Any
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Union, Any
 import warnings
 from urllib.parse import urljoin
 from collections import Counter, defaultdict
 import os
+import glob
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
@@ -23,10 +31,167 @@ logger = logging.getLogger(__name__)
 # Suprimir avisos do pandas
 warnings.filterwarnings('ignore', category=pd.errors.PerformanceWarning)
 
+# Expressões regulares usadas na extração dos dados (compiladas uma vez)
+_JSON_PARSE_RE = re.compile(r'JSON\.parse\(([\'"])(\[.*?\])\1\)', re.DOTALL)
+# SPG e número do ensaio em exp_name ("[SPG0121] Ensaio 102"), cada um opcional e em qualquer ordem
+_EXP_RE = re.compile(r'^(?=(?:.*?\[(SPG\d+)\])?)(?=(?:.*?Ensaio\s+(\d+))?)', re.DOTALL)
+_PAGINA_RE = re.compile(r'[?&]page=(\d+)(?:&|#|$)', re.IGNORECASE)
+# Links dentro do paginador (elemento cujo class, id ou aria-label menciona "pagin"/"pager")
+_MARCADOR_PAGINADOR = "translate(concat(@class, ' ', @id, ' ', @aria-label), 'PAGINER', 'paginer')"
+_XPATH_LINKS_PAGINADOR = etree.XPath(
+    f"//*[contains({_MARCADOR_PAGINADOR}, 'pagin') or contains({_MARCADOR_PAGINADOR}, 'pager')]//a/@href"
+)
+_JSON_DECODER = json.JSONDecoder()
+
+# Filtros de parsing: cada padrão de extração monta apenas as tags que consulta
+_FILTRO_SCRIPTS = SoupStrainer('script')
+_FILTRO_DATA_INSTRUMENT = SoupStrainer(attrs={'data-instrument': True})
+
+# Número máximo de páginas de instrumentos baixadas em paralelo
+MAX_WORKERS_PAGINAS = 8
+
+# Quantidade de arquivos JSON de instrumentos mantidos em data/json
+MAX_ARQUIVOS_JSON = 10
+
+# Datas nos formatos AAAA-MM-DD / DD-MM-AAAA (separador '-' ou '/'), com hora opcional
+_HORA = r'(?: (?:[01]\d|2[0-3]):[0-5]\d:(?:[0-5]\d|6[01]))?'
+_DATA_RE = re.compile(
+    r'(?:(?P<ano>\d{4})(?P<sep>[-/])(?P<mes>\d{2})(?P=sep)(?P<dia>\d{2})'
+    r'|(?P<dia2>\d{2})(?P<sep2>[-/])(?P<mes2>\d{2})(?P=sep2)(?P<ano2>\d{4}))'
+    + _HORA
+)
+
+# Campos copiados diretamente do SharePoint: (campo de origem, campo processado)
+_MAPA_CAMPOS = (
+    ('name', 'Instrumento'),
+    ('type', 'Tipo'),
+    ('brand', 'Marca'),
+    ('model', 'Modelo'),
+    ('serial_num', 'Número de Série'),
+    ('location', 'Localização'),
+    ('range', 'Faixa'),
+    ('description', 'Descrição'),
+    ('certif_num', 'Certificado'),
+    ('certif_end_date', 'ValidadeCertificado'),
+    ('acceptance_status', 'CriterioAceitacao'),
+)
+
+# Ordem dos campos nos dados processados
+_CAMPOS_PROCESSADOS = (
+    'SPG', 'Ensaio', 'Instrumento', 'Tipo', 'Marca', 'Modelo',
+    'Número de Série', 'Localização', 'Faixa', 'Unidade', 'Status',
+    'Classe', 'Certificado', 'Descrição', 'ValidadeCertificado',
+    'CriterioAceitacao', 'IntervaloOperacao',
+)
+
+# Colunas de entrada do DataManager gravadas no Parquet a partir dos campos
+# processados: (coluna do Parquet, campo processado de origem). O SharePoint
+# não informa a data da última calibração; a coluna é gravada vazia
+_COLUNAS_PARQUET = (
+    ('Tag', 'Número de Série'),
+    ('Última Calibração', None),
+    ('Próxima Calibração', 'ValidadeCertificado'),
+)
+
+# Campos sem os quais o instrumento é descartado
+_CAMPOS_OBRIGATORIOS = ('Instrumento', 'Tipo')
+
+# Marcador de campo ausente no registro de origem (um valor None é mantido)
+_AUSENTE = object()
+
+
+def _coluna_origem(dados: List[Dict[str, Any]], campo: str) -> pd.Series:
+    """Coluna de um campo dos registros brutos, com _AUSENTE onde ele não existe."""
+    return pd.Series([registro.get(campo, _AUSENTE) for registro in dados], dtype=object)
+
+
+def _como_texto(valor: Any) -> Optional[str]:
+    """Converte o valor para texto como str(); None se o campo estava ausente."""
+    return None if valor is _AUSENTE else str(valor)
+
+
+def _status_sensor(status: Any) -> Optional[str]:
+    """Traduz sensor_status (1/True ou 0/False) para o status exibido."""
+    if status is _AUSENTE:
+        return None
+    if status == 1:
+        return 'Ativo'
+    if status == 0:
+        return 'Bloqueado'
+    return None
+
+
+def _procurar_lista_json(texto: str) -> Optional[List[Dict[str, Any]]]:
+    """
+    Procura no texto o primeiro array JSON não vazio composto apenas por objetos.
+    
+    Cada '[' é testado com um decodificador incremental, evitando o retrocesso
+    de expressões regulares em scripts grandes.
+    
+    Args:
+        texto: Conteúdo a ser analisado
+        
+    Returns:
+        Lista de dicionários encontrada ou None
+    """
+    inicio = texto.find('[')
+    while inicio != -1:
+        try:
+            data, _ = _JSON_DECODER.raw_decode(texto, inicio)
+        except ValueError:
+            data = None
+        if isinstance(data, list) and data and all(isinstance(item, dict) for item in data):
+            return data
+        inicio = texto.find('[', inicio + 1)
+    return None
+
+
+# Sequências de mojibake corrigidas quando o texto não pode ser recodificado inteiro
+_SUBSTITUICOES_MOJIBAKE = {
+    'Ã©': 'é', 'Ã£': 'ã', 'Ã¢': 'â',
+    'Ã§': 'ç', 'Ãª': 'ê', 'Ã³': 'ó',
+    'Ã¡': 'á'
+}
+
+
+@lru_cache(maxsize=4096)
+def _limpar_texto(valor: Optional[Union[str, bytes]]) -> str:
+    """
+    Limpa e formata strings, desfazendo textos UTF-8 lidos como latin-1.
+    
+    O cache fica no nível do módulo para ser compartilhado entre instâncias
+    sem manter referências a elas.
+    
+    Args:
+        valor: Valor a ser limpo
+        
+    Returns:
+        String limpa e formatada
+    """
+    if valor is None or valor == '':
+        return '-'
+        
+    try:
+        if isinstance(valor, bytes):
+            valor = valor.decode('utf-8')
+        
+        valor = str(valor).strip()
+        try:
+            valor = valor.encode('latin1').decode('utf-8')
+        except UnicodeError:
+            # Texto misto: corrige apenas as sequências conhecidas
+            for antigo, novo in _SUBSTITUICOES_MOJIBAKE.items():
+                valor = valor.replace(antigo, novo)
+            
+        return valor if valor else '-'
+    except:
+        return '-'
+
+
 class SharePointManager:
     """Classe para gerenciar a comunicação com o SharePoint."""
     
-    def __init__(self, site_url: str, username: str, password: str):
+    def __init__(self, site_url: str, username: str, password: str, cache_ttl: float = 300):
         """
         Inicializa o gerenciador do SharePoint.
         
@@ -34,16 +199,35 @@ class SharePointManager:
             site_url: URL do site do SharePoint
             username: Nome de usuário para autenticação
             password: Senha para autenticação
+            cache_ttl: Tempo, em segundos, em que a lista de instrumentos obtida é reutilizada
         """
         self.site_url = site_url.rstrip('/')
         self.username = username
         self.password = password
         self.session = requests.Session()
         self.dados_instrumentos = None
+        self.cache_ttl = cache_ttl
+        self._fetched_at = 0.0
+        
+        # Gravações em disco feitas fora do caminho da requisição
+        self._io_pool = ThreadPoolExecutor(max_workers=1)
+        self._json_dir = os.path.join('data', 'json')
+        self._json_dir_criado = False
+        
+        # Pool de conexões reutilizáveis com novas tentativas em falhas temporárias
+        adaptador = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('http://', adaptador)
+        self.session.mount('https://', adaptador)
         
         # Headers padrão
         self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
         })
         
         # Verificar credenciais
@@ -68,7 +252,7 @@ class SharePointManager:
             response.raise_for_status()
             
             # Extrair formulário de login
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(response.text, 'lxml')
             form = soup.find('form')
             
             if not form:
@@ -127,15 +311,37 @@ class SharePointManager:
         try:
             self.session.close()
             self.session = None
+            self.invalidate_cache()
             logger.info("Desconectado do SharePoint")
         except Exception as e:
             logger.error(f"Erro ao desconectar do SharePoint: {str(e)}")
             raise
     
-    def obter_lista_instrumentos(self) -> List[Dict[str, Any]]:
+    def invalidate_cache(self) -> None:
+        """Descarta a lista de instrumentos em cache, forçando nova consulta ao SharePoint."""
+        self.dados_instrumentos = None
+        self._fetched_at = 0.0
+    
+    def _cache_valido(self) -> bool:
+        """
+        Verifica se a lista de instrumentos em cache ainda pode ser reutilizada.
+        
+        Returns:
+            True se houver dados obtidos há menos de cache_ttl segundos
+        """
+        return (
+            self.dados_instrumentos is not None
+            and time.monotonic() - self._fetched_at < self.cache_ttl
+        )
+    
+    def obter_lista_instrumentos(self, progresso: Optional[Callable[[str], None]] = None) -> List[Dict[str, Any]]:
         """
         Obtém a lista de instrumentos do SharePoint.
         
+        Args:
+            progresso: Função chamada com uma mensagem a cada página adicional
+                baixada (opcional)
+        
         Returns:
             Lista de dicionários com os dados dos instrumentos
             
@@ -162,6 +368,11 @@ class SharePointManager:
             # Extrair dados do JavaScript
             dados_instrumentos = self._extrair_dados_instrumentos(response.text)
             
+            # Demais páginas do catálogo, quando paginado
+            urls_paginas = self._obter_urls_paginas(response.text, response.url)
+            if urls_paginas:
+                dados_instrumentos.extend(self._obter_paginas_adicionais(urls_paginas, progresso))
+            
             # Validar dados
             if not dados_instrumentos:
                 raise ValueError("Nenhum dado de instrumento encontrado")
@@ -179,9 +390,10 @@ class SharePointManager:
             
             # Processar e armazenar os dados
             self.dados_instrumentos = self._processar_dados_instrumentos(dados_instrumentos)
+            self._fetched_at = time.monotonic()
             
-            # Salvar dados em JSON
-            self._salvar_dados_json(self.dados_instrumentos)
+            # Salvar dados em JSON em segundo plano
+            self._io_pool.submit(self._salvar_dados_json, self.dados_instrumentos)
             
             return self.dados_instrumentos
             
@@ -192,6 +404,124 @@ class SharePointManager:
             logger.error(f"Erro ao processar dados do SharePoint: {str(e)}")
             raise ValueError(f"Erro ao processar dados do SharePoint: {str(e)}")
     
+    def _obter_urls_paginas(self, html_content: str, url_base: str) -> List[str]:
+        """
+        Obtém as URLs das demais páginas da lista de instrumentos.
+        
+        Args:
+            html_content: Conteúdo HTML da primeira página
+            url_base: URL da primeira página, usada para resolver links relativos
+            
+        Returns:
+            Lista de URLs ordenada pelo número da página (sem a primeira página)
+        """
+        try:
+            raiz = lxml.html.fromstring(html_content)
+        except (etree.ParserError, ValueError):
+            return []
+        
+        # Apenas os links do paginador: outros links com page=N na página são ignorados
+        paginas = {}
+        for href in _XPATH_LINKS_PAGINADOR(raiz):
+            match = _PAGINA_RE.search(href)
+            if match:
+                numero = int(match.group(1))
+                if numero > 1 and numero not in paginas:
+                    paginas[numero] = urljoin(url_base, href)
+        return [paginas[numero] for numero in sorted(paginas)]
+    
+    def _criar_sessao_trabalho(self, cookies: requests.cookies.RequestsCookieJar) -> requests.Session:
+        """
+        Cria uma sessão HTTP para uso exclusivo de uma thread de download.
+        
+        Args:
+            cookies: Cookies de autenticação copiados da sessão principal
+            
+        Returns:
+            Sessão com os mesmos headers, cookies e política de novas tentativas
+        """
+        sessao = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=1,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        )
+        sessao.mount('http://', adaptador)
+        sessao.mount('https://', adaptador)
+        sessao.headers.update(self.session.headers)
+        sessao.cookies.update(cookies)
+        return sessao
+    
+    def _baixar_pagina(self, url: str, sessao: Optional[requests.Session] = None) -> List[Dict[str, Any]]:
+        """
+        Baixa uma página da lista de instrumentos e extrai seus dados.
+        
+        Args:
+            url: URL da página
+            sessao: Sessão a ser usada (padrão: sessão principal)
+            
+        Returns:
+            Lista de dicionários com os dados brutos dos instrumentos da página
+        """
+        response = (sessao or self.session).get(url)
+        response.raise_for_status()
+        return self._extrair_dados_instrumentos(response.text)
+    
+    def _obter_paginas_adicionais(
+        self, urls: List[str], progresso: Optional[Callable[[str], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Baixa e extrai as páginas adicionais em paralelo.
+        
+        Cada thread usa uma sessão própria (requests.Session não é segura entre
+        threads), criada com os cookies da sessão principal copiados uma vez.
+        Páginas que falham são registradas no log e ignoradas.
+        
+        Args:
+            urls: URLs das páginas, na ordem em que os dados devem ser mantidos
+            progresso: Função chamada, na thread que invocou este método, com
+                uma mensagem a cada página concluída (opcional)
+            
+        Returns:
+            Lista com os dados brutos das páginas obtidas, na ordem das URLs
+        """
+        logger.info(f"Baixando {len(urls)} páginas adicionais de instrumentos...")
+        resultados: Dict[int, List[Dict[str, Any]]] = {}
+        
+        cookies = self.session.cookies.copy()
+        locais = threading.local()
+        sessoes: List[requests.Session] = []
+        
+        def baixar(url: str) -> List[Dict[str, Any]]:
+            sessao = getattr(locais, 'sessao', None)
+            if sessao is None:
+                sessao = locais.sessao = self._criar_sessao_trabalho(cookies)
+                sessoes.append(sessao)
+            return self._baixar_pagina(url, sessao)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS_PAGINAS, len(urls))) as executor:
+                futuros = {executor.submit(baixar, url): idx for idx, url in enumerate(urls)}
+                for concluidas, futuro in enumerate(as_completed(futuros), start=1):
+                    idx = futuros[futuro]
+                    if progresso is not None:
+                        progresso(f"Baixando páginas de instrumentos ({concluidas}/{len(urls)})...")
+                    try:
+                        resultados[idx] = futuro.result()
+                    except requests.exceptions.RequestException as e:
+                        logger.warning(f"Página {urls[idx]} não pôde ser baixada: {str(e)}")
+                    except ValueError as e:
+                        # Página sem dados de instrumentos
+                        logger.warning(f"Página {urls[idx]} ignorada: {str(e)}")
+        finally:
+            for sessao in sessoes:
+                sessao.close()
+        
+        dados = []
+        for idx in sorted(resultados):
+            dados.extend(resultados[idx])
+        return dados
+    
     def _extrair_dados_instrumentos(self, html_content: str) -> List[Dict[str, Any]]:
         """
         Extrai os dados dos instrumentos do conteúdo HTML.
@@ -209,45 +539,35 @@ class SharePointManager:
         dados_instrumentos = []
         
         # 1. Procurar array JSON de instrumentos
-        match = re.search(r'JSON\.parse\((\'|")(\[.*?\])(\'|")\)', html_content, re.DOTALL)
+        match = _JSON_PARSE_RE.search(html_content)
         if match:
             try:
                 json_str = match.group(2)
                 json_str = json_str.replace('\\"', '"').replace('\\/', '/')
-                json_str = bytes(json_str, 'utf-8').decode('unicode_escape')
-                json_str = json_str.encode('latin1').decode('utf-8')
-                dados_instrumentos = json.loads(json_str)
+                json_bytes = json_str.encode('utf-8').decode('unicode_escape').encode('latin1')
+                dados_instrumentos = orjson.loads(json_bytes)
                 logger.info("Dados extraídos usando JSON.parse")
             except Exception as e:
                 logger.warning(f"Erro ao processar JSON.parse: {str(e)}")
         
         # 2. Procurar arrays JSON em tags script
         if not dados_instrumentos:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, 'lxml', parse_only=_FILTRO_SCRIPTS)
             for script in soup.find_all('script'):
                 if script.string:
                     # Procurar por arrays JSON
-                    matches = re.findall(r'(\[[\s\S]*?\])', script.string)
-                    for match in matches:
-                        try:
-                            data = json.loads(match)
-                            if isinstance(data, list) and len(data) > 0:
-                                # Verificar se parece ser uma lista de instrumentos
-                                if all(isinstance(item, dict) for item in data):
-                                    dados_instrumentos = data
-                                    logger.info("Dados extraídos de tag script")
-                                    break
-                        except:
-                            continue
-                    if dados_instrumentos:
+                    data = _procurar_lista_json(script.string)
+                    if data:
+                        dados_instrumentos = data
+                        logger.info("Dados extraídos de tag script")
                         break
         
         # 3. Procurar dados em atributos data-*
         if not dados_instrumentos:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, 'lxml', parse_only=_FILTRO_DATA_INSTRUMENT)
             for element in soup.find_all(attrs={"data-instrument": True}):
                 try:
-                    data = json.loads(element['data-instrument'])
+                    data = orjson.loads(element['data-instrument'])
                     if isinstance(data, dict):
                         dados_instrumentos.append(data)
                 except:
@@ -257,20 +577,22 @@ class SharePointManager:
         
         # 4. Procurar dados em tabelas HTML
         if not dados_instrumentos:
-            soup = BeautifulSoup(html_content, 'html.parser')
-            for table in soup.find_all('table'):
-                headers = []
-                for th in table.find_all('th'):
-                    headers.append(th.text.strip())
+            try:
+                raiz = lxml.html.fromstring(html_content)
+            except (etree.ParserError, ValueError):
+                raiz = None
+            tabelas = raiz.xpath('//table') if raiz is not None else []
+            for table in tabelas:
+                headers = [th.text_content().strip() for th in table.xpath('.//th')]
                 
                 if headers:
-                    for tr in table.find_all('tr')[1:]:  # Pular cabeçalho
-                        cells = tr.find_all('td')
+                    for tr in table.xpath('.//tr')[1:]:  # Pular cabeçalho
+                        cells = tr.xpath('.//td')
                         if len(cells) == len(headers):
-                            instrumento = {}
-                            for i, cell in enumerate(cells):
-                                instrumento[headers[i]] = cell.text.strip()
-                            dados_instrumentos.append(instrumento)
+                            dados_instrumentos.append({
+                                header: cell.text_content().strip()
+                                for header, cell in zip(headers, cells)
+                            })
             
             if dados_instrumentos:
                 logger.info("Dados extraídos de tabelas HTML")
@@ -291,119 +613,60 @@ class SharePointManager:
             Lista de dicionários com dados processados
         """
         logger.info("Iniciando processamento dos dados dos instrumentos...")
-        instrumentos_processados = []
+        if not dados:
+            logger.info("Processamento concluído. 0 instrumentos processados com sucesso.")
+            return []
         
-        for idx, instrumento in enumerate(dados):
-            try:
-                logger.debug(f"Processando instrumento {idx + 1}/{len(dados)}")
-                
-                # Mapeamento de campos com valores padrão
-                instrumento_processado = {
-                    'SPG': '-',
-                    'Ensaio': '-',
-                    'Instrumento': '-',
-                    'Tipo': '-',
-                    'Marca': '-',
-                    'Modelo': '-',
-                    'Número de Série': '-',
-                    'Localização': '-',
-                    'Faixa': '-',
-                    'Unidade': '-',
-                    'Status': '-',
-                    'Classe': '-',
-                    'Certificado': '-',
-                    'Descrição': '-',
-                    'ValidadeCertificado': '-',
-                    'CriterioAceitacao': '-',
-                    'IntervaloOperacao': '-'
-                }
-                
-                # Mapeamento direto dos campos com base na estrutura real
-                if 'name' in instrumento:
-                    instrumento_processado['Instrumento'] = str(instrumento['name'])
-                
-                if 'type' in instrumento:
-                    instrumento_processado['Tipo'] = str(instrumento['type'])
-                
-                if 'brand' in instrumento:
-                    instrumento_processado['Marca'] = str(instrumento['brand'])
-                
-                if 'model' in instrumento:
-                    instrumento_processado['Modelo'] = str(instrumento['model'])
-                
-                if 'serial_num' in instrumento:
-                    instrumento_processado['Número de Série'] = str(instrumento['serial_num'])
-                
-                if 'location' in instrumento:
-                    instrumento_processado['Localização'] = str(instrumento['location'])
-                
-                if 'range' in instrumento:
-                    instrumento_processado['Faixa'] = str(instrumento['range'])
-                
-                if 'description' in instrumento:
-                    instrumento_processado['Descrição'] = str(instrumento['description'])
-                
-                if 'certif_num' in instrumento:
-                    instrumento_processado['Certificado'] = str(instrumento['certif_num'])
-                
-                if 'certif_end_date' in instrumento:
-                    instrumento_processado['ValidadeCertificado'] = str(instrumento['certif_end_date'])
-                
-                if 'acceptance_status' in instrumento:
-                    instrumento_processado['CriterioAceitacao'] = str(instrumento['acceptance_status'])
-                
-                # Extrair SPG e Ensaio do campo exp_name
-                if 'exp_name' in instrumento:
-                    exp_name = str(instrumento['exp_name'])
-                    # Formato esperado: "[SPG0121] Ensaio 102"
-                    spg_match = re.search(r'\[(SPG\d+)\]', exp_name)
-                    ensaio_match = re.search(r'Ensaio\s+(\d+)', exp_name)
-                    
-                    if spg_match:
-                        instrumento_processado['SPG'] = spg_match.group(1)
-                    
-                    if ensaio_match:
-                        instrumento_processado['Ensaio'] = f"Ensaio {ensaio_match.group(1)}"
-                
-                # Extrair Status
-                if 'sensor_status' in instrumento:
-                    status = instrumento['sensor_status']
-                    if status == 1:
-                        instrumento_processado['Status'] = 'Ativo'
-                    elif status == 0:
-                        instrumento_processado['Status'] = 'Bloqueado'
-                
-                # Extrair Intervalo de Operação
-                if 'inst_range' in instrumento and isinstance(instrumento['inst_range'], list) and instrumento['inst_range']:
-                    range_info = instrumento['inst_range'][0]
-                    if isinstance(range_info, dict):
-                        min_val = range_info.get('min', '0')
-                        max_val = range_info.get('max', '')
-                        unit = range_info.get('unit', '')
-                        if max_val and unit:
-                            instrumento_processado['IntervaloOperacao'] = f"{min_val} - {max_val} {unit}"
-                
-                # Remover campos vazios
-                instrumento_processado = {k: v for k, v in instrumento_processado.items() if v != '-'}
-                
-                # Validar campos obrigatórios
-                campos_obrigatorios = ['Instrumento', 'Tipo']
-                campos_faltantes = [campo for campo in campos_obrigatorios if campo not in instrumento_processado]
-                if campos_faltantes:
-                    logger.warning(f"Instrumento {idx + 1} está faltando campos obrigatórios: {campos_faltantes}")
-                    continue
-                
-                instrumentos_processados.append(instrumento_processado)
-                
-            except Exception as e:
-                logger.error(f"Erro ao processar instrumento {idx + 1}: {str(e)}")
-                logger.debug(f"Dados do instrumento com erro: {instrumento}")
-                continue
+        # Colunas montadas a partir dos registros, separando campo ausente de
+        # valor None: como antes, um None presente vira o texto 'None'
+        campos_origem = set().union(*dados)
+        processados = pd.DataFrame(index=pd.RangeIndex(len(dados)))
+        
+        # Mapeamento direto dos campos com base na estrutura real
+        for origem, destino in _MAPA_CAMPOS:
+            if origem in campos_origem:
+                processados[destino] = _coluna_origem(dados, origem).map(_como_texto)
+        
+        # Extrair SPG e Ensaio do campo exp_name (formato esperado: "[SPG0121] Ensaio 102")
+        if 'exp_name' in campos_origem:
+            exp_name = _coluna_origem(dados, 'exp_name').map(_como_texto).astype('string')
+            exp = exp_name.str.extract(_EXP_RE)
+            processados['SPG'] = exp[0]
+            processados['Ensaio'] = 'Ensaio ' + exp[1]
+        
+        # Extrair Status (comparação por igualdade: True/1.0 também são 'Ativo')
+        if 'sensor_status' in campos_origem:
+            processados['Status'] = _coluna_origem(dados, 'sensor_status').map(_status_sensor)
+        
+        # Extrair Intervalo de Operação
+        if 'inst_range' in campos_origem:
+            processados['IntervaloOperacao'] = _coluna_origem(dados, 'inst_range').map(
+                lambda intervalo: None if intervalo is _AUSENTE else self._obter_intervalo_operacao(intervalo)
+            )
+        
+        # Remover campos vazios
+        colunas = [campo for campo in _CAMPOS_PROCESSADOS if campo in processados]
+        processados = processados[colunas].astype(object)
+        processados = processados.where(processados.notna() & processados.ne('-'), None)
+        
+        # Validar campos obrigatórios
+        faltantes = pd.DataFrame({
+            campo: processados[campo].isna() if campo in processados else True
+            for campo in _CAMPOS_OBRIGATORIOS
+        }, index=processados.index)
+        invalidos = faltantes.any(axis=1)
+        for idx, linha in zip(np.flatnonzero(invalidos.to_numpy()), faltantes[invalidos].itertuples(index=False, name=None)):
+            campos_faltantes = [campo for campo, faltante in zip(_CAMPOS_OBRIGATORIOS, linha) if faltante]
+            logger.warning(f"Instrumento {idx + 1} está faltando campos obrigatórios: {campos_faltantes}")
+        
+        instrumentos_processados = [
+            {campo: valor for campo, valor in zip(colunas, linha) if valor is not None}
+            for linha in processados[~invalidos].itertuples(index=False, name=None)
+        ]
         
         logger.info(f"Processamento concluído. {len(instrumentos_processados)} instrumentos processados com sucesso.")
         return instrumentos_processados
     
-    @lru_cache(maxsize=128)
     def _limpar_texto(self, valor: Optional[Union[str, bytes]]) -> str:
         """
         Limpa e formata strings (com cache para melhor performance).
@@ -414,25 +677,7 @@ class SharePointManager:
         Returns:
             String limpa e formatada
         """
-        if valor is None or valor == '':
-            return '-'
-            
-        try:
-            if isinstance(valor, bytes):
-                valor = valor.decode('utf-8')
-            
-            valor = str(valor).strip()
-            substituicoes = {
-                'Ã©': 'é', 'Ã£': 'ã', 'Ã¢': 'â',
-                'Ã§': 'ç', 'Ãª': 'ê', 'Ã³': 'ó',
-                'Ã¡': 'á'
-            }
-            for antigo, novo in substituicoes.items():
-                valor = valor.replace(antigo, novo)
-                
-            return valor if valor else '-'
-        except:
-            return '-'
+        return _limpar_texto(valor)
     
     def _formatar_data(self, data: Optional[str]) -> str:
         """
@@ -451,6 +696,19 @@ class SharePointManager:
             # Remove espaços extras
             data = data.strip()
             
+            # Caminho rápido: formatos comuns reconhecidos por expressão regular
+            match = _DATA_RE.fullmatch(data)
+            if match:
+                ano = match['ano'] or match['ano2']
+                mes = match['mes'] or match['mes2']
+                dia = match['dia'] or match['dia2']
+                try:
+                    date(int(ano), int(mes), int(dia))
+                    return f"{ano}-{mes}-{dia}"
+                except ValueError:
+                    logger.warning(f"Formato de data não reconhecido: {data}")
+                    return '-'
+            
             # Lista de formatos possíveis
             formatos = [
                 '%Y-%m-%d',           # 2024-04-18
@@ -515,8 +773,11 @@ class SharePointManager:
         logger.info("Calculando estatísticas dos dados...")
         
         try:
-            # Obter lista de instrumentos processados
-            instrumentos = self.obter_lista_instrumentos()
+            # Obter lista de instrumentos processados (reutiliza o cache recente)
+            if self._cache_valido():
+                instrumentos = self.dados_instrumentos
+            else:
+                instrumentos = self.obter_lista_instrumentos()
             
             if not instrumentos:
                 logger.warning("Nenhum instrumento encontrado para calcular estatísticas")
@@ -529,40 +790,23 @@ class SharePointManager:
                     'valores_nulos': Counter()
                 }
             
-            # Inicializar contadores
-            total_por_spg = Counter()
-            total_por_ensaio = Counter()
-            total_por_status = Counter()
-            instrumentos_por_classe = Counter()
-            valores_nulos = Counter()
+            # Calcular estatísticas em uma única tabela
+            df = pd.DataFrame(instrumentos)
             
-            # Calcular estatísticas
-            for idx, instrumento in enumerate(instrumentos):
-                try:
-                    # Contar por SPG
-                    if 'SPG' in instrumento:
-                        total_por_spg[instrumento['SPG']] += 1
-                    
-                    # Contar por Ensaio
-                    if 'Ensaio' in instrumento:
-                        total_por_ensaio[instrumento['Ensaio']] += 1
-                    
-                    # Contar por Status
-                    if 'Status' in instrumento:
-                        total_por_status[instrumento['Status']] += 1
-                    
-                    # Contar por Classe (usando Tipo como classe)
-                    if 'Tipo' in instrumento:
-                        instrumentos_por_classe[instrumento['Tipo']] += 1
-                    
-                    # Contar valores nulos
-                    for campo, valor in instrumento.items():
-                        if not valor or valor == '-':
-                            valores_nulos[campo] += 1
-                    
-                except Exception as e:
-                    logger.error(f"Erro ao processar estatísticas do instrumento {idx + 1}: {str(e)}")
-                    continue
+            def contar(coluna: str) -> Counter:
+                if coluna not in df:
+                    return Counter()
+                return Counter(df[coluna].value_counts().to_dict())
+            
+            total_por_spg = contar('SPG')
+            total_por_ensaio = contar('Ensaio')
+            total_por_status = contar('Status')
+            # Contar por Classe (usando Tipo como classe)
+            instrumentos_por_classe = contar('Tipo')
+            
+            # Contar valores nulos entre os campos preenchidos
+            nulos = (df.eq('') | df.eq('-')).sum()
+            valores_nulos = Counter(nulos[nulos > 0].to_dict())
             
             # Log das estatísticas calculadas
             logger.info(f"Total de instrumentos: {len(instrumentos)}")
@@ -614,6 +858,33 @@ class SharePointManager:
                 
         return '-'
     
+    def salvar_dados_parquet(self, dados: List[Dict[str, Any]], caminho: Union[str, os.PathLike]) -> None:
+        """
+        Salva os dados dos instrumentos em um arquivo Parquet.
+        
+        Além dos campos processados, grava as colunas Tag, Última Calibração e
+        Próxima Calibração, para que o arquivo possa ser aberto pelo DataManager.
+        
+        Args:
+            dados: Lista de dicionários com os dados dos instrumentos
+            caminho: Caminho do arquivo Parquet a ser gerado
+            
+        Raises:
+            Exception: Se houver erro ao gravar o arquivo
+        """
+        try:
+            # As colunas seguem a ordem dos campos processados
+            df = pd.DataFrame(dados, columns=list(_CAMPOS_PROCESSADOS), dtype=object)
+            for coluna, origem in _COLUNAS_PARQUET:
+                df[coluna] = df[origem] if origem is not None else None
+            df.to_parquet(caminho, engine="pyarrow", compression="zstd", index=False)
+            
+            logger.info(f"Dados salvos em {caminho}")
+            
+        except Exception as e:
+            logger.error(f"Erro ao salvar dados em Parquet: {str(e)}")
+            raise
+    
     def _salvar_dados_json(self, dados: List[Dict[str, Any]]) -> None:
         """
         Salva os dados dos instrumentos em um arquivo JSON.
@@ -624,17 +895,25 @@ class SharePointManager:
         try:
             # Criar nome do arquivo com timestamp
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            nome_arquivo = f"data/json/instrumentos_{timestamp}.json"
+            nome_arquivo = os.path.join(self._json_dir, f"instrumentos_{timestamp}.json")
             
-            # Garantir que o diretório existe
-            os.makedirs(os.path.dirname(nome_arquivo), exist_ok=True)
+            # Garantir que o diretório existe (verificado uma vez por instância)
+            if not self._json_dir_criado:
+                os.makedirs(self._json_dir, exist_ok=True)
+                self._json_dir_criado = True
             
             # Salvar dados em JSON
-            with open(nome_arquivo, 'w', encoding='utf-8') as f:
-                json.dump(dados, f, ensure_ascii=False, indent=2)
+            with open(nome_arquivo, 'wb') as f:
+                f.write(orjson.dumps(dados, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
             
             logger.info(f"Dados salvos em {nome_arquivo}")
             
+            # Manter apenas os arquivos mais recentes
+            arquivos = sorted(glob.glob(os.path.join(self._json_dir, 'instrumentos_*.json')))
+            for antigo in arquivos[:-MAX_ARQUIVOS_JSON]:
+                os.remove(antigo)
+                logger.debug(f"Arquivo JSON antigo removido: {antigo}")
+            
         except Exception as e:
             logger.error(f"Erro ao salvar dados em JSON: {str(e)}")
             raise 
\ No newline at end of file
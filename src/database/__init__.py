@@ -1,14 +1,17 @@
 """
 Database package initialization file.
 """
-from .database import get_db, engine, Base
+from .database import get_db, get_conn, engine, Base
 from .models import Instrumento
 from .repository import InstrumentoRepository
+from .db_worker import DBWorker
 
 __all__ = [
     'get_db',
+    'get_conn',
     'engine',
     'Base',
     'Instrumento',
-    'InstrumentoRepository'
+    'InstrumentoRepository',
+    'DBWorker'
 ] 
\ No newline at end of file
@@ -2,18 +2,74 @@
 Configuração do banco de dados.
 """
 import os
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import StaticPool
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 
 # Configuração do banco de dados
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///instrumentos.db')
 
+# Pragmas aplicados a cada nova conexão SQLite
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA foreign_keys=ON',
+    'PRAGMA busy_timeout=5000',
+)
+
+def _configurar_sqlite(dbapi_connection, connection_record):
+    """Aplica os pragmas de desempenho em uma nova conexão SQLite."""
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+def criar_engine(url: str, **kwargs) -> Engine:
+    """
+    Cria o engine do SQLAlchemy com pool de conexões configurado.
+    
+    Em SQLite, as conexões podem ser compartilhadas entre threads e recebem
+    os pragmas de SQLITE_PRAGMAS (WAL, mmap, cache em memória). Como as
+    escritas no arquivo são serializadas, o pool fica limitado a poucas
+    conexões persistentes; bancos em memória usam uma única conexão (StaticPool).
+    
+    Args:
+        url: URL de conexão com o banco de dados
+        **kwargs: Argumentos adicionais repassados para create_engine
+        
+    Returns:
+        Engine do SQLAlchemy
+    """
+    sqlite = url.startswith('sqlite')
+    opcoes = {'pool_pre_ping': True}
+    
+    if sqlite:
+        opcoes['connect_args'] = {'check_same_thread': False, 'timeout': 30}
+        if url in ('sqlite://', 'sqlite:///:memory:') or 'mode=memory' in url:
+            opcoes['poolclass'] = StaticPool
+        else:
+            opcoes.update(pool_size=5, max_overflow=0)
+    else:
+        opcoes.update(pool_size=20, max_overflow=40, pool_recycle=1800)
+    opcoes.update(kwargs)
+    
+    engine = create_engine(url, **opcoes)
+    if sqlite:
+        event.listen(engine, 'connect', _configurar_sqlite)
+    return engine
+
 # Criar engine do SQLAlchemy
-engine = create_engine(DATABASE_URL)
+engine = criar_engine(DATABASE_URL)
 
 # Criar sessão
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Criar base para os modelos
 Base = declarative_base()
@@ -2,11 +2,12 @@
 Conexão com o banco de dados.
 """
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError
 import logging
 
+from src.database.config import criar_engine
+
 logger = logging.getLogger(__name__)
 
 class DatabaseConnection:
@@ -27,7 +28,7 @@ class DatabaseConnection:
     def connect(self):
         """Estabelece a conexão com o banco de dados."""
         try:
-            self.engine = create_engine(self.db_url)
+            self.engine = criar_engine(self.db_url)
             self.Session = sessionmaker(bind=self.engine)
             logger.info(f"Conexão estabelecida com o banco de dados: {self.db_url}")
             return True
@@ -2,11 +2,12 @@
 Configuração do banco de dados usando SQLAlchemy.
 """
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import logging
 
+from src.database.config import criar_engine
+
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
@@ -21,22 +22,32 @@ if DATABASE_URL.startswith("sqlite:///"):
         os.makedirs(db_dir, exist_ok=True)
         logger.info(f"Diretório do banco de dados criado/verificado: {db_dir}")
 
-# Cria o engine do SQLAlchemy
-engine = create_engine(DATABASE_URL, echo=True)
+# Cria o engine do SQLAlchemy (SQL_ECHO=1 registra os comandos SQL no log)
+engine = criar_engine(DATABASE_URL, echo=os.getenv("SQL_ECHO", "0") == "1")
 
 # Cria a sessão
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Cria a base para os modelos
 Base = declarative_base()
 
-def init_db(force_recreate=False):
+# Índices de coluna única já cobertos pela chave primária ou por um índice
+# composto; removidos dos bancos criados antes de deixarem os modelos
+_INDICES_OBSOLETOS = (
+    "ix_instrumentos_id",
+    "ix_instrumentos_numero_serie",
+    "ix_instrumentos_spg",
+)
+
+def init_db(force_recreate=False, with_indexes=True):
     """
     Inicializa o banco de dados criando todas as tabelas.
     
     Args:
         force_recreate (bool): Se True, remove o banco de dados existente antes de criar um novo.
                              Se False, apenas cria as tabelas se elas não existirem.
+        with_indexes (bool): Se False, as tabelas ficam sem os índices secundários, para uma
+                             carga inicial mais rápida; crie-os depois com criar_indices().
     """
     try:
         # Importar modelos para garantir que eles sejam registrados
@@ -54,13 +65,48 @@ def init_db(force_recreate=False):
                 os.makedirs(db_dir, exist_ok=True)
                 logger.info(f"Diretório do banco de dados recriado: {db_dir}")
         
-        # Criar tabelas
-        Base.metadata.create_all(bind=engine)
+        # Criar tabelas (metadados dos modelos, que usam a Base de models.py)
+        metadata = Instrumento.metadata
+        metadata.create_all(bind=engine)
+        
+        if with_indexes:
+            criar_indices()
+        else:
+            # Sem índices, cada linha da carga em massa grava apenas a tabela
+            for tabela in metadata.sorted_tables:
+                for indice in tabela.indexes:
+                    indice.drop(bind=engine, checkfirst=True)
+            logger.info("Índices secundários removidos para a carga inicial")
         logger.info("Banco de dados inicializado com sucesso")
     except Exception as e:
         logger.error(f"Erro ao inicializar banco de dados: {str(e)}")
         raise
 
+def criar_indices():
+    """
+    Cria os índices declarados nos modelos que ainda não existem no banco.
+    
+    Chamado por init_db e, após uma carga feita com init_db(with_indexes=False),
+    pelo próprio chamador: montar o índice sobre a tabela já populada é mais
+    rápido que mantê-lo a cada inserção.
+    """
+    from .models import Instrumento
+    
+    # Remover índices redundantes, que só tornam as gravações mais lentas
+    with engine.begin() as conn:
+        for nome in _INDICES_OBSOLETOS:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {nome}")
+    
+    # Criar índices adicionados depois da criação das tabelas existentes
+    for tabela in Instrumento.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(bind=engine, checkfirst=True)
+    
+    # Atualizar as estatísticas usadas pelo planejador de consultas do SQLite
+    if DATABASE_URL.startswith("sqlite"):
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+
 def get_db():
     """
     Função para obter uma sessão do banco de dados.
@@ -74,7 +120,27 @@ def get_db():
     finally:
         db.close()
 
+def get_conn():
+    """
+    Função para obter uma conexão do banco de dados, sem sessão do ORM.
+    
+    Indicada para consultas somente leitura, que não precisam de mapa de
+    identidade nem de controle de transação do ORM.
+    
+    Yields:
+        Connection: Conexão do SQLAlchemy
+    """
+    with engine.connect() as conn:
+        yield conn
+
 def close_db():
     """Fecha a conexão com o banco de dados."""
-    SessionLocal.remove()
+    # Deixa o SQLite atualizar as estatísticas dos índices e incorporar o WAL ao arquivo principal
+    if DATABASE_URL.startswith("sqlite"):
+        with engine.begin() as conn:
+            conn.exec_driver_sql("PRAGMA optimize")
+            conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    
+    # Devolve todas as conexões do pool (SessionLocal não é um scoped_session)
+    engine.dispose()
     logger.info("Conexão com o banco de dados fechada") 
\ No newline at end of file
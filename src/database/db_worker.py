@@ -0,0 +1,112 @@
+"""
+Módulo com a thread dedicada ao acesso ao banco de dados.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from sqlalchemy.orm import Session, sessionmaker
+
+from .database import SessionLocal
+from .repository import InstrumentoRepository
+
+# Configuração de logging
+logger = logging.getLogger(__name__)
+
+# Quantidade máxima de tarefas aguardando execução
+TAMANHO_FILA = 100
+
+# Marcador que encerra o laço da thread
+_PARAR = object()
+
+
+class DBWorker:
+    """
+    Executa as operações do repositório em uma única thread que possui a sessão.
+
+    As tarefas recebem o repositório da thread como primeiro argumento, por
+    exemplo ``worker.submit(InstrumentoRepository.listar_todos)``, e o
+    resultado é entregue em um ``concurrent.futures.Future``.
+    """
+
+    def __init__(self, session_factory: sessionmaker = SessionLocal, tamanho_fila: int = TAMANHO_FILA):
+        """
+        Inicializa o worker.
+
+        Args:
+            session_factory: Fábrica da sessão usada pela thread
+            tamanho_fila: Quantidade máxima de tarefas pendentes
+        """
+        self._session_factory = session_factory
+        self._fila: "queue.Queue[Any]" = queue.Queue(maxsize=tamanho_fila)
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        """Inicia a thread do banco de dados, se ainda não estiver rodando."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._executar, name="DBWorker", daemon=True)
+        self._thread.start()
+
+    def submit(self, tarefa: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """
+        Enfileira uma tarefa para a thread do banco de dados.
+
+        Args:
+            tarefa: Função chamada como ``tarefa(repo, *args, **kwargs)``
+            *args: Argumentos posicionais da tarefa
+            **kwargs: Argumentos nomeados da tarefa
+
+        Returns:
+            Future: Resultado da tarefa
+
+        Raises:
+            RuntimeError: Se o worker não foi iniciado
+        """
+        if self._thread is None or not self._thread.is_alive():
+            raise RuntimeError("DBWorker não iniciado")
+
+        futuro: Future = Future()
+        # Bloqueia quando a fila está cheia, limitando o trabalho pendente
+        self._fila.put((tarefa, args, kwargs, futuro))
+        return futuro
+
+    def parar(self, timeout: Optional[float] = None) -> None:
+        """
+        Encerra a thread após concluir as tarefas já enfileiradas.
+
+        Args:
+            timeout: Tempo máximo de espera pelo encerramento, em segundos
+        """
+        if self._thread is None:
+            return
+        self._fila.put(_PARAR)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _executar(self) -> None:
+        """Laço da thread: consome a fila usando uma sessão exclusiva."""
+        db: Session = self._session_factory()
+        repo = InstrumentoRepository(db)
+        try:
+            while True:
+                item = self._fila.get()
+                if item is _PARAR:
+                    break
+
+                tarefa, args, kwargs, futuro = item
+                if not futuro.set_running_or_notify_cancel():
+                    continue
+
+                try:
+                    futuro.set_result(tarefa(repo, *args, **kwargs))
+                except Exception as e:
+                    # Descarta a transação pendente para as próximas tarefas
+                    db.rollback()
+                    logger.error(f"❌ Erro na tarefa do banco de dados: {str(e)}")
+                    futuro.set_exception(e)
+        finally:
+            # Sempre fecha a sessão na própria thread que a criou
+            db.close()
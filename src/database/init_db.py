@@ -6,11 +6,16 @@ from .database import init_db as init_database
 
 logger = logging.getLogger(__name__)
 
-def init_db():
-    """Inicializa o banco de dados criando todas as tabelas."""
+def init_db(with_indexes=True):
+    """
+    Inicializa o banco de dados criando todas as tabelas.
+    
+    Args:
+        with_indexes (bool): Se False, os índices secundários não são criados (carga inicial).
+    """
     try:
         logger.info("Inicializando banco de dados...")
-        init_database()
+        init_database(with_indexes=with_indexes)
         logger.info("Banco de dados inicializado com sucesso!")
     except Exception as e:
         logger.error(f"Erro ao inicializar banco de dados: {str(e)}")
@@ -1,9 +1,20 @@
 """
 Modelos para as tabelas do banco de dados.
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Date, ForeignKey, Index
 from sqlalchemy.orm import DeclarativeBase, relationship
 from datetime import datetime
+from operator import attrgetter
+
+# Campos retornados por Instrumento.to_dict, na ordem do dicionário
+_CAMPOS_DICT = (
+    "id", "nome", "tipo", "marca", "modelo", "numero_serie", "descricao",
+    "faixa", "unidade", "classe", "criterio_aceitacao", "intervalo_operacao",
+    "spg", "ensaio", "localizacao", "status", "certificado",
+    "validade_certificado", "data_criacao", "data_atualizacao",
+)
+_CAMPOS_DATA = ("validade_certificado", "data_criacao", "data_atualizacao")
+_obter_campos_dict = attrgetter(*_CAMPOS_DICT)
 
 class Base(DeclarativeBase):
     """Classe base para todos os modelos."""
@@ -13,11 +24,19 @@ class Instrumento(Base):
     """Modelo para Instrumentos."""
     
     __tablename__ = 'instrumentos'
+    # numero_serie e spg não têm índice próprio: são o prefixo de
+    # ix_inst_ns_nome e ix_spg_ensaio, que já atendem as buscas só por eles
+    __table_args__ = (
+        # Índice de cobertura para a busca por número de série/nome na sincronização
+        Index('ix_inst_ns_nome', 'numero_serie', 'nome'),
+        # Filtro combinado por SPG e ensaio; também atende o filtro só por SPG
+        Index('ix_spg_ensaio', 'spg', 'ensaio'),
+    )
     
     # Identificação básica
-    id = Column(Integer, primary_key=True, index=True)
-    nome = Column(String(100), nullable=False)
-    tipo = Column(String(50), nullable=False)
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(100), nullable=False, index=True)
+    tipo = Column(String(50), nullable=False, index=True)
     marca = Column(String(100))
     modelo = Column(String(100))
     numero_serie = Column(String(100))
@@ -31,12 +50,13 @@ class Instrumento(Base):
     intervalo_operacao = Column(String(200))
     
     # Localização e organização
-    spg = Column(String(50), index=True)
-    ensaio = Column(String(100))
+    spg = Column(String(50))
+    # Índice próprio para obter_por_ensaio: ensaio não é o prefixo de ix_spg_ensaio
+    ensaio = Column(String(100), index=True)
     localizacao = Column(String(200))
     
     # Status e certificação
-    status = Column(String(50))
+    status = Column(String(50), index=True)
     certificado = Column(String(100))
     validade_certificado = Column(Date)
     
@@ -50,25 +70,8 @@ class Instrumento(Base):
 
     def to_dict(self):
         """Converte o instrumento para um dicionário."""
-        return {
-            "id": self.id,
-            "nome": self.nome,
-            "tipo": self.tipo,
-            "marca": self.marca,
-            "modelo": self.modelo,
-            "numero_serie": self.numero_serie,
-            "descricao": self.descricao,
-            "faixa": self.faixa,
-            "unidade": self.unidade,
-            "classe": self.classe,
-            "criterio_aceitacao": self.criterio_aceitacao,
-            "intervalo_operacao": self.intervalo_operacao,
-            "spg": self.spg,
-            "ensaio": self.ensaio,
-            "localizacao": self.localizacao,
-            "status": self.status,
-            "certificado": self.certificado,
-            "validade_certificado": self.validade_certificado.isoformat() if self.validade_certificado else None,
-            "data_criacao": self.data_criacao.isoformat() if self.data_criacao else None,
-            "data_atualizacao": self.data_atualizacao.isoformat() if self.data_atualizacao else None
-        } 
\ No newline at end of file
+        dados = dict(zip(_CAMPOS_DICT, _obter_campos_dict(self)))
+        for campo in _CAMPOS_DATA:
+            valor = dados[campo]
+            dados[campo] = valor.isoformat() if valor else None
+        return dados
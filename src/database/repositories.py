@@ -2,7 +2,7 @@
 Repositórios para acesso aos dados.
 """
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import or_
+from sqlalchemy import insert, lambda_stmt, or_, select, update
 import logging
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -17,12 +17,13 @@ class SPGRepository:
     def __init__(self, session):
         self.session = session
         
-    def criar(self, dados: Dict[str, Any]) -> Optional[SPG]:
+    def criar(self, dados: Dict[str, Any], commit: bool = True) -> Optional[SPG]:
         """
         Cria um novo SPG.
         
         Args:
             dados: Dicionário com os dados do SPG.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             SPG: Objeto SPG criado ou None em caso de erro.
@@ -30,10 +31,12 @@ class SPGRepository:
         try:
             spg = SPG(**dados)
             self.session.add(spg)
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return spg
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao criar SPG: {str(e)}")
             return None
             
@@ -47,7 +50,8 @@ class SPGRepository:
         Returns:
             SPG: Objeto SPG encontrado ou None.
         """
-        return self.session.query(SPG).filter(SPG.codigo == codigo).first()
+        stmt = lambda_stmt(lambda: select(SPG).where(SPG.codigo == codigo).limit(1))
+        return self.session.execute(stmt).scalars().first()
         
     def listar_todos(self) -> List[SPG]:
         """
@@ -56,15 +60,16 @@ class SPGRepository:
         Returns:
             List[SPG]: Lista de SPGs.
         """
-        return self.session.query(SPG).all()
+        return self.session.execute(lambda_stmt(lambda: select(SPG))).scalars().all()
         
-    def atualizar(self, spg: SPG, dados: Dict[str, Any]) -> bool:
+    def atualizar(self, spg: SPG, dados: Dict[str, Any], commit: bool = True) -> bool:
         """
         Atualiza um SPG.
         
         Args:
             spg: Objeto SPG a ser atualizado.
             dados: Dicionário com os novos dados.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             bool: True se a atualização foi bem sucedida.
@@ -73,29 +78,34 @@ class SPGRepository:
             for chave, valor in dados.items():
                 setattr(spg, chave, valor)
             spg.data_atualizacao = datetime.now()
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return True
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao atualizar SPG: {str(e)}")
             return False
             
-    def excluir(self, spg: SPG) -> bool:
+    def excluir(self, spg: SPG, commit: bool = True) -> bool:
         """
         Exclui um SPG.
         
         Args:
             spg: Objeto SPG a ser excluído.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             bool: True se a exclusão foi bem sucedida.
         """
         try:
             self.session.delete(spg)
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return True
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao excluir SPG: {str(e)}")
             return False
 
@@ -105,12 +115,13 @@ class EnsaioRepository:
     def __init__(self, session):
         self.session = session
         
-    def criar(self, dados: Dict[str, Any]) -> Optional[Ensaio]:
+    def criar(self, dados: Dict[str, Any], commit: bool = True) -> Optional[Ensaio]:
         """
         Cria um novo Ensaio.
         
         Args:
             dados: Dicionário com os dados do Ensaio.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             Ensaio: Objeto Ensaio criado ou None em caso de erro.
@@ -118,10 +129,12 @@ class EnsaioRepository:
         try:
             ensaio = Ensaio(**dados)
             self.session.add(ensaio)
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return ensaio
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao criar Ensaio: {str(e)}")
             return None
             
@@ -135,7 +148,8 @@ class EnsaioRepository:
         Returns:
             Ensaio: Objeto Ensaio encontrado ou None.
         """
-        return self.session.query(Ensaio).filter(Ensaio.codigo == codigo).first()
+        stmt = lambda_stmt(lambda: select(Ensaio).where(Ensaio.codigo == codigo).limit(1))
+        return self.session.execute(stmt).scalars().first()
         
     def listar_por_spg(self, spg_id: int) -> List[Ensaio]:
         """
@@ -147,15 +161,17 @@ class EnsaioRepository:
         Returns:
             List[Ensaio]: Lista de Ensaios.
         """
-        return self.session.query(Ensaio).filter(Ensaio.spg_id == spg_id).all()
+        stmt = lambda_stmt(lambda: select(Ensaio).where(Ensaio.spg_id == spg_id))
+        return self.session.execute(stmt).scalars().all()
         
-    def atualizar(self, ensaio: Ensaio, dados: Dict[str, Any]) -> bool:
+    def atualizar(self, ensaio: Ensaio, dados: Dict[str, Any], commit: bool = True) -> bool:
         """
         Atualiza um Ensaio.
         
         Args:
             ensaio: Objeto Ensaio a ser atualizado.
             dados: Dicionário com os novos dados.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             bool: True se a atualização foi bem sucedida.
@@ -164,29 +180,34 @@ class EnsaioRepository:
             for chave, valor in dados.items():
                 setattr(ensaio, chave, valor)
             ensaio.data_atualizacao = datetime.now()
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return True
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao atualizar Ensaio: {str(e)}")
             return False
             
-    def excluir(self, ensaio: Ensaio) -> bool:
+    def excluir(self, ensaio: Ensaio, commit: bool = True) -> bool:
         """
         Exclui um Ensaio.
         
         Args:
             ensaio: Objeto Ensaio a ser excluído.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             bool: True se a exclusão foi bem sucedida.
         """
         try:
             self.session.delete(ensaio)
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return True
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao excluir Ensaio: {str(e)}")
             return False
 
@@ -196,12 +217,13 @@ class InstrumentoRepository:
     def __init__(self, session):
         self.session = session
         
-    def criar(self, dados: Dict[str, Any]) -> Optional[Instrumento]:
+    def criar(self, dados: Dict[str, Any], commit: bool = True) -> Optional[Instrumento]:
         """
         Cria um novo Instrumento.
         
         Args:
             dados: Dicionário com os dados do Instrumento.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             Instrumento: Objeto Instrumento criado ou None em caso de erro.
@@ -209,10 +231,12 @@ class InstrumentoRepository:
         try:
             instrumento = Instrumento(**dados)
             self.session.add(instrumento)
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return instrumento
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao criar Instrumento: {str(e)}")
             return None
             
@@ -226,9 +250,10 @@ class InstrumentoRepository:
         Returns:
             Instrumento: Objeto Instrumento encontrado ou None.
         """
-        return self.session.query(Instrumento).filter(
-            Instrumento.identificacao == identificacao
-        ).first()
+        stmt = lambda_stmt(
+            lambda: select(Instrumento).where(Instrumento.identificacao == identificacao).limit(1)
+        )
+        return self.session.execute(stmt).scalars().first()
         
     def listar_por_spg(self, spg_id: int) -> List[Instrumento]:
         """
@@ -240,9 +265,8 @@ class InstrumentoRepository:
         Returns:
             List[Instrumento]: Lista de Instrumentos.
         """
-        return self.session.query(Instrumento).filter(
-            Instrumento.spg_id == spg_id
-        ).all()
+        stmt = lambda_stmt(lambda: select(Instrumento).where(Instrumento.spg_id == spg_id))
+        return self.session.execute(stmt).scalars().all()
         
     def listar_por_ensaio(self, ensaio_id: int) -> List[Instrumento]:
         """
@@ -254,67 +278,87 @@ class InstrumentoRepository:
         Returns:
             List[Instrumento]: Lista de Instrumentos.
         """
-        return self.session.query(Instrumento).filter(
-            Instrumento.ensaio_id == ensaio_id
-        ).all()
+        stmt = lambda_stmt(lambda: select(Instrumento).where(Instrumento.ensaio_id == ensaio_id))
+        return self.session.execute(stmt).scalars().all()
         
-    def atualizar(self, instrumento: Instrumento, dados: Dict[str, Any]) -> bool:
+    def atualizar(self, instrumento: Instrumento, dados: Dict[str, Any], commit: bool = True) -> bool:
         """
         Atualiza um Instrumento.
         
         Args:
             instrumento: Objeto Instrumento a ser atualizado.
             dados: Dicionário com os novos dados.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             bool: True se a atualização foi bem sucedida.
         """
         try:
-            for chave, valor in dados.items():
-                if getattr(instrumento, chave) != valor:
-                    # Registra o histórico da alteração
-                    historico = HistoricoInstrumento(
-                        instrumento_id=instrumento.id,
-                        campo_alterado=chave,
-                        valor_anterior=str(getattr(instrumento, chave)),
-                        valor_novo=str(valor)
-                    )
-                    self.session.add(historico)
-                    setattr(instrumento, chave, valor)
+            # Lê os valores atuais uma única vez e separa os campos alterados
+            atuais = {chave: getattr(instrumento, chave) for chave in dados}
+            alterados = {chave: valor for chave, valor in dados.items() if atuais[chave] != valor}
+            
+            # Registra o histórico das alterações em um único INSERT
+            if alterados:
+                self.session.execute(insert(HistoricoInstrumento), [
+                    {
+                        "instrumento_id": instrumento.id,
+                        "campo_alterado": chave,
+                        "valor_anterior": str(atuais[chave]),
+                        "valor_novo": str(valor)
+                    }
+                    for chave, valor in alterados.items()
+                ])
             
-            instrumento.data_atualizacao = datetime.now()
-            self.session.commit()
+            # Aplica as alterações diretamente, sem o rastreamento de atributos do ORM
+            # (o carimbo de atualização prevalece sobre um data_atualizacao em dados)
+            self.session.execute(
+                update(Instrumento)
+                .where(Instrumento.id == instrumento.id)
+                .values({**alterados, "data_atualizacao": datetime.now()})
+            )
+            # A sessão não expira objetos no commit; recarrega os valores gravados
+            self.session.expire(instrumento)
+            if commit:
+                self.session.commit()
             return True
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao atualizar Instrumento: {str(e)}")
             return False
             
-    def excluir(self, instrumento: Instrumento) -> bool:
+    def excluir(self, instrumento: Instrumento, commit: bool = True) -> bool:
         """
         Exclui um Instrumento.
         
         Args:
             instrumento: Objeto Instrumento a ser excluído.
+            commit: Se False, a transação fica a cargo do chamador.
             
         Returns:
             bool: True se a exclusão foi bem sucedida.
         """
         try:
             self.session.delete(instrumento)
-            self.session.commit()
+            if commit:
+                self.session.commit()
             return True
         except SQLAlchemyError as e:
-            self.session.rollback()
+            if commit:
+                self.session.rollback()
             logger.error(f"Erro ao excluir Instrumento: {str(e)}")
             return False
             
-    def buscar_por_filtros(self, filtros: Dict[str, Any]) -> List[Instrumento]:
+    def buscar_por_filtros(self, filtros: Dict[str, Any], prefix_mode: bool = True) -> List[Instrumento]:
         """
         Busca instrumentos por filtros.
         
         Args:
             filtros: Dicionário com os filtros de busca.
+            prefix_mode: Se True, campos texto são buscados pelo início do valor
+                (LIKE 'valor%', que aproveita os índices); se False, em
+                qualquer posição (ILIKE '%valor%', exige varredura da tabela).
             
         Returns:
             List[Instrumento]: Lista de instrumentos que atendem aos filtros.
@@ -324,9 +368,11 @@ class InstrumentoRepository:
         for campo, valor in filtros.items():
             if valor:
                 if isinstance(valor, str):
-                    query = query.filter(
-                        getattr(Instrumento, campo).ilike(f"%{valor}%")
-                    )
+                    coluna = getattr(Instrumento, campo)
+                    if prefix_mode:
+                        query = query.filter(coluna.like(f"{valor}%"))
+                    else:
+                        query = query.filter(coluna.ilike(f"%{valor}%"))
                 else:
                     query = query.filter(getattr(Instrumento, campo) == valor)
                     
@@ -342,6 +388,9 @@ class InstrumentoRepository:
         Returns:
             List[HistoricoInstrumento]: Lista de registros de histórico.
         """
-        return self.session.query(HistoricoInstrumento).filter(
-            HistoricoInstrumento.instrumento_id == instrumento_id
-        ).order_by(HistoricoInstrumento.data_alteracao.desc()).all() 
\ No newline at end of file
+        stmt = lambda_stmt(
+            lambda: select(HistoricoInstrumento)
+            .where(HistoricoInstrumento.instrumento_id == instrumento_id)
+            .order_by(HistoricoInstrumento.data_alteracao.desc())
+        )
+        return self.session.execute(stmt).scalars().all() 
\ No newline at end of file
@@ -1,12 +1,62 @@
 """Repositório para operações com instrumentos."""
 
 import logging
-from typing import List, Optional, Dict, Any
+from datetime import date
+from typing import List, Optional, Dict, Any, Tuple, Union
+from sqlalchemy import bindparam, delete, insert, select, text, update
 from sqlalchemy.orm import Session
 from .models import Instrumento
 
 logger = logging.getLogger("instrumentos")
 
+# Colunas do modelo preenchidas a partir dos campos do JSON de instrumentos
+CAMPOS_JSON = (
+    ('spg', 'SPG'),
+    ('ensaio', 'Ensaio'),
+    ('nome', 'Instrumento'),
+    ('tipo', 'Tipo'),
+    ('marca', 'Marca'),
+    ('modelo', 'Modelo'),
+    ('numero_serie', 'Número de Série'),
+    ('localizacao', 'Localização'),
+    ('faixa', 'Faixa'),
+    ('unidade', 'Unidade'),
+    ('status', 'Status'),
+    ('classe', 'Classe'),
+    ('certificado', 'Certificado'),
+    ('descricao', 'Descrição'),
+    ('criterio_aceitacao', 'CriterioAceitacao'),
+    ('intervalo_operacao', 'IntervaloOperacao'),
+)
+
+# Quantidade máxima de parâmetros por cláusula IN (limite do SQLite)
+TAMANHO_LOTE = 500
+
+# Fração de linhas inseridas/removidas a partir da qual as estatísticas são refeitas
+LIMIAR_ANALYZE = 0.05
+
+# Consultas frequentes construídas uma única vez (executadas com parâmetros nomeados)
+_Q_TODOS = select(Instrumento)
+_Q_POR_ID = select(Instrumento).where(Instrumento.id == bindparam("id")).limit(1)
+_Q_POR_NUMERO_SERIE = select(Instrumento).where(Instrumento.numero_serie == bindparam("numero_serie")).limit(1)
+_Q_POR_SPG = select(Instrumento).where(Instrumento.spg == bindparam("spg"))
+_Q_POR_ENSAIO = select(Instrumento).where(Instrumento.ensaio == bindparam("ensaio"))
+_Q_POR_TIPO = select(Instrumento).where(Instrumento.tipo == bindparam("tipo"))
+_Q_POR_STATUS = select(Instrumento).where(Instrumento.status == bindparam("status"))
+_INSERIR_INSTRUMENTO = insert(Instrumento)
+
+# Consultas de exibição: apenas as colunas mostradas, sem montar objetos ORM
+_COLUNAS_EXIBICAO = (Instrumento.id, Instrumento.nome, Instrumento.status)
+_Q_LINHAS_POR_SPG = select(*_COLUNAS_EXIBICAO).where(Instrumento.spg == bindparam("spg"))
+
+# Nomes das colunas aceitas nos dicionários de importação
+_COLUNAS_INSTRUMENTO = frozenset(coluna.key for coluna in Instrumento.__table__.columns)
+
+def _colunas_preenchidas(instrumento: Instrumento) -> Dict[str, Any]:
+    """Retorna as colunas atribuídas em um objeto Instrumento ainda não persistido."""
+    estado = instrumento.__dict__
+    return {coluna.key: estado[coluna.key] for coluna in Instrumento.__table__.columns if coluna.key in estado}
+
 class InstrumentoRepository:
     """Repositório para operações com instrumentos."""
 
@@ -14,39 +64,97 @@ class InstrumentoRepository:
         """Inicializa o repositório com uma sessão do banco de dados."""
         self.db = db
 
-    def criar(self, instrumento: Instrumento) -> Instrumento:
-        """Cria um novo instrumento no banco de dados."""
+    def criar(self, instrumento: Instrumento, commit: bool = True) -> Instrumento:
+        """
+        Cria um novo instrumento no banco de dados.
+        
+        Com commit=False a gravação fica na transação aberta pelo chamador.
+        """
         try:
             self.db.add(instrumento)
-            self.db.commit()
-            self.db.refresh(instrumento)
+            if commit:
+                self.db.commit()
+            else:
+                self.db.flush()
             logger.info(f"✅ Instrumento criado com sucesso: {instrumento.id}")
             return instrumento
         except Exception as e:
-            self.db.rollback()
+            if commit:
+                self.db.rollback()
             logger.error(f"❌ Erro ao criar instrumento: {e}")
             raise
 
-    def criar_em_massa(self, instrumentos: List[Instrumento]) -> List[Instrumento]:
-        """Cria múltiplos instrumentos no banco de dados."""
+    def criar_em_massa(
+        self, instrumentos: List[Union[Instrumento, Dict[str, Any]]], commit: bool = True
+    ) -> List[Union[Instrumento, Dict[str, Any]]]:
+        """
+        Cria múltiplos instrumentos no banco de dados.
+        
+        Aceita objetos Instrumento ou dicionários de colunas; ambos são enviados
+        em um único INSERT executado em lote (executemany). Com commit=False a
+        gravação fica na transação aberta pelo chamador.
+        """
         try:
-            self.db.bulk_save_objects(instrumentos)
-            self.db.commit()
+            linhas = [
+                item if isinstance(item, dict) else _colunas_preenchidas(item)
+                for item in instrumentos
+            ]
+            if linhas:
+                self.db.execute(_INSERIR_INSTRUMENTO, linhas)
+            if commit:
+                self.db.commit()
             logger.info(f"✅ {len(instrumentos)} instrumentos criados com sucesso")
             return instrumentos
         except Exception as e:
-            self.db.rollback()
+            if commit:
+                self.db.rollback()
             logger.error(f"❌ Erro ao criar instrumentos em massa: {e}")
             raise
 
-    def limpar_tabela(self) -> None:
+    def salvar_em_massa(self, dados: List[Dict[str, Any]], commit: bool = True) -> Dict[str, int]:
+        """
+        Insere e atualiza instrumentos em massa a partir de dicionários de colunas.
+        
+        Registros com 'id' são atualizados; os demais são inseridos com um único
+        INSERT executado em lote (executemany), na mesma transação.
+        
+        Args:
+            dados: Lista de dicionários com as colunas do modelo Instrumento
+            commit: Se False, não confirma nem desfaz a transação (controlada pelo chamador)
+            
+        Returns:
+            Dict com a quantidade de registros inseridos e atualizados
+        """
+        novos = [item for item in dados if item.get('id') is None]
+        existentes = [item for item in dados if item.get('id') is not None]
+        try:
+            if novos:
+                self.db.execute(_INSERIR_INSTRUMENTO, novos)
+            if existentes:
+                # UPDATE em massa pelo ORM (por chave primária), como em
+                # sincronizar_dados: também atualiza os objetos já carregados na
+                # sessão, que com expire_on_commit=False não seriam relidos
+                self.db.execute(update(Instrumento), existentes)
+            if commit:
+                self.db.commit()
+            logger.info(f"✅ {len(novos)} instrumentos inseridos e {len(existentes)} atualizados em massa")
+            return {"inseridos": len(novos), "atualizados": len(existentes)}
+        except Exception as e:
+            if commit:
+                self.db.rollback()
+            logger.error(f"❌ Erro ao salvar instrumentos em massa: {e}")
+            raise
+
+    def limpar_tabela(self, commit: bool = True) -> None:
         """Limpa todos os registros da tabela de instrumentos."""
         try:
             self.db.query(Instrumento).delete()
-            self.db.commit()
+            if commit:
+                self.db.commit()
             logger.info("🧹 Tabela de instrumentos limpa com sucesso")
         except Exception as e:
-            self.db.rollback()
+            if commit:
+                self.db.rollback()
             logger.error(f"❌ Erro ao limpar tabela de instrumentos: {e}")
             raise
 
@@ -61,106 +169,99 @@ class InstrumentoRepository:
             Dict com estatísticas de sincronização (adicionados, atualizados, removidos)
         """
         try:
-            # Obter todos os instrumentos existentes no banco
-            instrumentos_existentes = self.db.query(Instrumento).all()
-            logger.info(f"📊 Encontrados {len(instrumentos_existentes)} instrumentos no banco de dados")
-            
-            # Criar dicionários para facilitar a busca
-            instrumentos_por_numero_serie = {inst.numero_serie: inst for inst in instrumentos_existentes if inst.numero_serie}
-            instrumentos_por_nome = {inst.nome: inst for inst in instrumentos_existentes if inst.nome}
-            
-            # Contadores para estatísticas
-            adicionados = 0
-            atualizados = 0
-            removidos = 0
-            avisos = 0
-            
-            # Conjunto para rastrear instrumentos processados
-            processados = set()
-            
-            # Processar cada instrumento do JSON
-            for inst_json in instrumentos_json:
-                nome = inst_json.get('Instrumento')
-                numero_serie = inst_json.get('Número de Série')
+            with self.db.no_autoflush:
+                # Obter apenas as colunas de identificação dos instrumentos existentes
+                existentes = self.db.execute(
+                    select(Instrumento.id, Instrumento.numero_serie, Instrumento.nome)
+                ).all()
+                logger.info(f"📊 Encontrados {len(existentes)} instrumentos no banco de dados")
+                
+                # Criar dicionários para facilitar a busca
+                ids_por_numero_serie = {numero_serie: id_ for id_, numero_serie, _ in existentes if numero_serie}
+                ids_por_nome = {nome: id_ for id_, _, nome in existentes if nome}
+                identificadores = [(id_, numero_serie or nome) for id_, numero_serie, nome in existentes]
                 
-                # Tentar encontrar o instrumento pelo número de série ou nome
-                instrumento = None
-                if numero_serie and numero_serie in instrumentos_por_numero_serie:
-                    instrumento = instrumentos_por_numero_serie[numero_serie]
-                elif nome and nome in instrumentos_por_nome:
-                    instrumento = instrumentos_por_nome[nome]
+                # Linhas a inserir e a atualizar em lote
+                novos = []
+                atualizacoes = []
+                avisos = 0
                 
-                # Converter a data de validade se existir
-                validade = None
-                if inst_json.get('ValidadeCertificado') and inst_json.get('ValidadeCertificado') != '-':
-                    try:
-                        from datetime import datetime
-                        validade = datetime.strptime(inst_json['ValidadeCertificado'], '%Y-%m-%d').date()
-                    except ValueError:
-                        logger.warning(f"⚠️ Data de validade inválida para o instrumento {nome}: {inst_json.get('ValidadeCertificado')}")
-                        avisos += 1
+                # Datas de validade já convertidas (as exportações repetem muitas datas)
+                datas_convertidas: Dict[str, date] = {}
                 
-                if instrumento:
-                    # Atualizar instrumento existente
-                    instrumento.spg = inst_json.get('SPG')
-                    instrumento.ensaio = inst_json.get('Ensaio')
-                    instrumento.nome = nome
-                    instrumento.tipo = inst_json.get('Tipo')
-                    instrumento.marca = inst_json.get('Marca')
-                    instrumento.modelo = inst_json.get('Modelo')
-                    instrumento.numero_serie = numero_serie
-                    instrumento.localizacao = inst_json.get('Localização')
-                    instrumento.faixa = inst_json.get('Faixa')
-                    instrumento.unidade = inst_json.get('Unidade')
-                    instrumento.status = inst_json.get('Status')
-                    instrumento.classe = inst_json.get('Classe')
-                    instrumento.certificado = inst_json.get('Certificado')
-                    instrumento.descricao = inst_json.get('Descrição')
-                    instrumento.validade_certificado = validade
-                    instrumento.criterio_aceitacao = inst_json.get('CriterioAceitacao')
-                    instrumento.intervalo_operacao = inst_json.get('IntervaloOperacao')
+                # Conjunto para rastrear instrumentos processados
+                processados = set()
+                
+                # Processar cada instrumento do JSON
+                for inst_json in instrumentos_json:
+                    nome = inst_json.get('Instrumento')
+                    numero_serie = inst_json.get('Número de Série')
                     
-                    atualizados += 1
-                else:
-                    # Criar novo instrumento
-                    novo_instrumento = Instrumento(
-                        spg=inst_json.get('SPG'),
-                        ensaio=inst_json.get('Ensaio'),
-                        nome=nome,
-                        tipo=inst_json.get('Tipo'),
-                        marca=inst_json.get('Marca'),
-                        modelo=inst_json.get('Modelo'),
-                        numero_serie=numero_serie,
-                        localizacao=inst_json.get('Localização'),
-                        faixa=inst_json.get('Faixa'),
-                        unidade=inst_json.get('Unidade'),
-                        status=inst_json.get('Status'),
-                        classe=inst_json.get('Classe'),
-                        certificado=inst_json.get('Certificado'),
-                        descricao=inst_json.get('Descrição'),
-                        validade_certificado=validade,
-                        criterio_aceitacao=inst_json.get('CriterioAceitacao'),
-                        intervalo_operacao=inst_json.get('IntervaloOperacao')
-                    )
-                    self.db.add(novo_instrumento)
-                    adicionados += 1
+                    # Tentar encontrar o instrumento pelo número de série ou nome
+                    instrumento_id = None
+                    if numero_serie and numero_serie in ids_por_numero_serie:
+                        instrumento_id = ids_por_numero_serie[numero_serie]
+                    elif nome and nome in ids_por_nome:
+                        instrumento_id = ids_por_nome[nome]
+                    
+                    # Converter a data de validade se existir
+                    validade = None
+                    if inst_json.get('ValidadeCertificado') and inst_json.get('ValidadeCertificado') != '-':
+                        texto_validade = inst_json['ValidadeCertificado']
+                        try:
+                            validade = datas_convertidas.get(texto_validade)
+                            if validade is None:
+                                validade = date.fromisoformat(texto_validade)
+                                datas_convertidas[texto_validade] = validade
+                        except ValueError:
+                            logger.warning(f"⚠️ Data de validade inválida para o instrumento {nome}: {inst_json.get('ValidadeCertificado')}")
+                            avisos += 1
+                    
+                    linha = {coluna: inst_json.get(campo) for coluna, campo in CAMPOS_JSON}
+                    linha['validade_certificado'] = validade
+                    
+                    if instrumento_id is not None:
+                        # Atualizar instrumento existente
+                        linha['id'] = instrumento_id
+                        atualizacoes.append(linha)
+                    else:
+                        # Criar novo instrumento
+                        novos.append(linha)
+                    
+                    # Marcar como processado
+                    if numero_serie:
+                        processados.add(numero_serie)
+                    elif nome:
+                        processados.add(nome)
                 
-                # Marcar como processado
-                if numero_serie:
-                    processados.add(numero_serie)
-                elif nome:
-                    processados.add(nome)
-            
-            # Identificar instrumentos a serem removidos (não estão mais no JSON)
-            for inst in instrumentos_existentes:
-                identificador = inst.numero_serie or inst.nome
-                if identificador and identificador not in processados:
-                    self.db.delete(inst)
-                    removidos += 1
+                # Identificar instrumentos a serem removidos (não estão mais no JSON)
+                ids_remover = [
+                    instrumento_id for instrumento_id, identificador in identificadores
+                    if identificador and identificador not in processados
+                ]
+                
+                # Aplicar as alterações com um comando por operação (executemany)
+                if novos:
+                    self.db.execute(_INSERIR_INSTRUMENTO, novos)
+                if atualizacoes:
+                    self.db.execute(update(Instrumento), atualizacoes)
+                for inicio in range(0, len(ids_remover), TAMANHO_LOTE):
+                    lote = ids_remover[inicio:inicio + TAMANHO_LOTE]
+                    self.db.execute(delete(Instrumento).where(Instrumento.id.in_(lote)))
             
-            # Commit das alterações
+            # Commit das alterações (transação única)
             self.db.commit()
             
+            adicionados = len(novos)
+            atualizados = len(atualizacoes)
+            removidos = len(ids_remover)
+            
+            # Refazer as estatísticas do SQLite quando a tabela mudou de forma relevante
+            if (adicionados + removidos) > LIMIAR_ANALYZE * max(len(existentes), 1) \
+                    and self.db.get_bind().dialect.name == "sqlite":
+                self.db.execute(text("ANALYZE"))
+                self.db.commit()
+            
             # Retornar estatísticas
             estatisticas = {
                 "adicionados": adicionados,
@@ -179,71 +280,96 @@ class InstrumentoRepository:
 
     def obter_por_id(self, instrumento_id: int) -> Optional[Instrumento]:
         """Obtém um instrumento pelo ID."""
-        return self.db.query(Instrumento).filter(Instrumento.id == instrumento_id).first()
+        return self.db.execute(_Q_POR_ID, {"id": instrumento_id}).scalars().first()
 
     def listar_todos(self) -> List[Instrumento]:
         """Lista todos os instrumentos."""
-        return self.db.query(Instrumento).all()
+        return self.db.execute(_Q_TODOS).scalars().all()
 
-    def atualizar(self, instrumento_id: int, dados: Dict[str, Any]) -> Optional[Instrumento]:
+    def atualizar(self, instrumento_id: int, dados: Dict[str, Any], commit: bool = True) -> Optional[Instrumento]:
         """Atualiza um instrumento existente."""
         try:
             instrumento = self.obter_por_id(instrumento_id)
             if instrumento:
                 for chave, valor in dados.items():
                     setattr(instrumento, chave, valor)
-                self.db.commit()
-                self.db.refresh(instrumento)
+                if commit:
+                    self.db.commit()
+                else:
+                    self.db.flush()
                 logger.info(f"✅ Instrumento {instrumento_id} atualizado com sucesso")
             return instrumento
         except Exception as e:
-            self.db.rollback()
+            if commit:
+                self.db.rollback()
             logger.error(f"❌ Erro ao atualizar instrumento {instrumento_id}: {e}")
             raise
 
-    def deletar(self, instrumento_id: int) -> bool:
+    def deletar(self, instrumento_id: int, commit: bool = True) -> bool:
         """Deleta um instrumento pelo ID."""
         try:
             instrumento = self.obter_por_id(instrumento_id)
             if instrumento:
                 self.db.delete(instrumento)
-                self.db.commit()
+                if commit:
+                    self.db.commit()
                 logger.info(f"✅ Instrumento {instrumento_id} deletado com sucesso")
                 return True
             return False
         except Exception as e:
-            self.db.rollback()
+            if commit:
+                self.db.rollback()
             logger.error(f"❌ Erro ao deletar instrumento {instrumento_id}: {e}")
             raise
 
     def obter_por_spg(self, spg: str) -> List[Instrumento]:
         """Obtém instrumentos por SPG."""
-        return self.db.query(Instrumento).filter(Instrumento.spg == spg).all()
+        return self.db.execute(_Q_POR_SPG, {"spg": spg}).scalars().all()
+
+    def obter_por_spg_linhas(self, spg: str) -> List[Tuple[int, str, Optional[str]]]:
+        """
+        Obtém as linhas de exibição (id, nome, status) dos instrumentos de um SPG.
+        
+        Destinado a listagens somente leitura; para edição use obter_por_spg.
+        
+        Args:
+            spg: SPG a ser consultado
+            
+        Returns:
+            List[Tuple[int, str, Optional[str]]]: Tuplas (id, nome, status)
+        """
+        return self.db.execute(_Q_LINHAS_POR_SPG, {"spg": spg}).all()
 
     def obter_por_ensaio(self, ensaio: str) -> List[Instrumento]:
         """Obtém instrumentos por ensaio."""
-        return self.db.query(Instrumento).filter(Instrumento.ensaio == ensaio).all()
+        return self.db.execute(_Q_POR_ENSAIO, {"ensaio": ensaio}).scalars().all()
 
     def obter_por_tipo(self, tipo: str) -> List[Instrumento]:
         """Obtém instrumentos por tipo."""
-        return self.db.query(Instrumento).filter(Instrumento.tipo == tipo).all()
+        return self.db.execute(_Q_POR_TIPO, {"tipo": tipo}).scalars().all()
 
     def obter_por_status(self, status: str) -> List[Instrumento]:
         """Obtém instrumentos por status."""
-        return self.db.query(Instrumento).filter(Instrumento.status == status).all()
+        return self.db.execute(_Q_POR_STATUS, {"status": status}).scalars().all()
 
     def obter_por_numero_serie(self, numero_serie: str) -> Optional[Instrumento]:
         """Obtém um instrumento pelo número de série."""
-        return self.db.query(Instrumento).filter(Instrumento.numero_serie == numero_serie).first()
+        return self.db.execute(_Q_POR_NUMERO_SERIE, {"numero_serie": numero_serie}).scalars().first()
 
-    def importar_dados_json(self, dados: List[Dict[str, Any]]) -> List[Instrumento]:
-        """Importa dados de instrumentos a partir de uma lista de dicionários."""
+    def importar_dados_json(self, dados: List[Dict[str, Any]], commit: bool = True) -> List[Dict[str, Any]]:
+        """
+        Importa dados de instrumentos a partir de uma lista de dicionários.
+        
+        Os dicionários são inseridos diretamente, sem construir objetos ORM.
+        
+        Raises:
+            TypeError: Se algum dicionário tiver chaves que não são colunas do modelo
+        """
         try:
-            instrumentos = []
-            for item in dados:
-                instrumento = Instrumento(**item)
-                instrumentos.append(instrumento)
-            return self.criar_em_massa(instrumentos)
+            desconhecidas = set().union(*dados) - _COLUNAS_INSTRUMENTO
+            if desconhecidas:
+                raise TypeError(f"Campos inválidos para Instrumento: {', '.join(sorted(desconhecidas))}")
+            return self.criar_em_massa(dados, commit=commit)
         except Exception as e:
             logger.error(f"❌ Erro ao importar dados JSON: {e}")
             raise 
\ No newline at end of file
@@ -1,6 +1,7 @@
 """
 Módulo responsável pela interface gráfica principal.
 """
+import time
 from pathlib import Path
 from typing import Optional
 
@@ -10,21 +11,52 @@ from PyQt6.QtWidgets import (QComboBox, QFileDialog, QHBoxLayout, QLabel,
                             QMainWindow, QMessageBox, QProgressBar, QPushButton,
                             QVBoxLayout, QWidget)
 
-from src.core.config import DIR_OUTPUT
+from src.core.config import (DIR_OUTPUT, SHAREPOINT_PASSWORD, SHAREPOINT_SITE_URL,
+                             SHAREPOINT_USERNAME)
 from src.core.data_manager import DataManager
 from src.core.excel_manager import ExcelManager
 from src.core.sharepoint_manager import SharePointManager
 
+# Intervalo mínimo, em segundos, entre mensagens de progresso intermediárias
+INTERVALO_PROGRESSO = 0.1
 
-class GeradorTabelaThread(QThread):
-    """Thread para gerar a tabela em segundo plano."""
+
+class ThreadComProgresso(QThread):
+    """Thread base que limita a frequência dos sinais de progresso."""
     
     progresso = pyqtSignal(str)
+    
+    def __init__(self):
+        """Inicializa a thread."""
+        super().__init__()
+        self._ultimo_progresso = 0.0
+    
+    def emitir_progresso(self, mensagem: str, final: bool = False):
+        """
+        Emite uma mensagem de progresso, descartando as que chegam rápido demais.
+        
+        Destinado a atualizações frequentes, como as páginas baixadas do
+        SharePoint; as mensagens de etapa continuam usando ``progresso.emit``
+        diretamente.
+        
+        Args:
+            mensagem: Mensagem a ser exibida.
+            final: Se True, a mensagem é sempre emitida.
+        """
+        agora = time.monotonic()
+        if final or agora - self._ultimo_progresso >= INTERVALO_PROGRESSO:
+            self.progresso.emit(mensagem)
+            self._ultimo_progresso = agora
+
+
+class GeradorTabelaThread(ThreadComProgresso):
+    """Thread para gerar a tabela em segundo plano."""
+    
     erro = pyqtSignal(str)
     finalizado = pyqtSignal(Path)
     
     def __init__(self, arquivo_excel: Path, pasta_saida: Path, spg: Optional[str] = None,
-                 ensaio: Optional[str] = None):
+                 ensaio: Optional[str] = None, data_manager: Optional[DataManager] = None):
         """
         Inicializa a thread.
         
@@ -33,21 +65,26 @@ class GeradorTabelaThread(QThread):
             pasta_saida: Pasta onde a tabela será salva.
             spg: SPG selecionado (opcional).
             ensaio: Ensaio selecionado (opcional).
+            data_manager: Gerenciador com os dados já carregados (opcional).
         """
         super().__init__()
         self.arquivo_excel = arquivo_excel
         self.pasta_saida = pasta_saida
         self.spg = spg
         self.ensaio = ensaio
-        self.data_manager = DataManager()
+        self.data_manager = data_manager or DataManager()
         self.excel_manager = ExcelManager(pasta_saida)
     
     def run(self):
         """Executa a geração da tabela."""
         try:
-            # Carrega os dados
-            self.progresso.emit("Carregando dados...")
-            dados = self.data_manager.carregar_dados(self.arquivo_excel)
+            # Reaproveita os dados já carregados pela janela, se vieram deste
+            # mesmo arquivo e ele não foi alterado desde a carga
+            if self.data_manager.possui_dados_de(self.arquivo_excel):
+                dados = self.data_manager.dados
+            else:
+                self.progresso.emit("Carregando dados...")
+                dados = self.data_manager.carregar_dados(self.arquivo_excel)
             
             # Gera a tabela
             self.progresso.emit("Gerando tabela...")
@@ -71,29 +108,23 @@ class GeradorTabelaThread(QThread):
             self.erro.emit(str(e))
 
 
-class CarregarDadosSharePointThread(QThread):
+class CarregarDadosSharePointThread(ThreadComProgresso):
     """Thread para carregar dados do SharePoint em segundo plano."""
     
-    progresso = pyqtSignal(str)
     erro = pyqtSignal(str)
     finalizado = pyqtSignal(Path)
     
-    def __init__(self, site_url: str, username: str, password: str, pasta_saida: Path):
+    def __init__(self, sharepoint_manager: SharePointManager, pasta_saida: Path):
         """
         Inicializa a thread.
         
         Args:
-            site_url: URL do site do SharePoint.
-            username: Nome de usuário para autenticação.
-            password: Senha para autenticação.
-            pasta_saida: Pasta onde o arquivo Excel será salvo.
+            sharepoint_manager: Gerenciador do SharePoint reutilizado entre atualizações.
+            pasta_saida: Pasta onde o arquivo de dados será salvo.
         """
         super().__init__()
-        self.site_url = site_url
-        self.username = username
-        self.password = password
         self.pasta_saida = pasta_saida
-        self.sharepoint_manager = SharePointManager(site_url, username, password)
+        self.sharepoint_manager = sharepoint_manager
     
     def run(self):
         """Executa o carregamento dos dados."""
@@ -102,17 +133,15 @@ class CarregarDadosSharePointThread(QThread):
             self.progresso.emit("Conectando ao SharePoint...")
             self.sharepoint_manager.conectar()
             
-            # Obtém os dados
+            # Obtém os dados (uma atualização pedida pelo usuário ignora o cache)
             self.progresso.emit("Obtendo dados dos instrumentos...")
-            dados = self.sharepoint_manager.obter_lista_instrumentos()
+            self.sharepoint_manager.invalidate_cache()
+            dados = self.sharepoint_manager.obter_lista_instrumentos(self.emitir_progresso)
             
-            # Salva os dados em um arquivo Excel
-            self.progresso.emit("Salvando dados em arquivo Excel...")
-            caminho_arquivo = self.pasta_saida / "instrumentos.xlsx"
-            self.sharepoint_manager.salvar_dados_excel(dados, caminho_arquivo)
-            
-            # Desconecta do SharePoint
-            self.sharepoint_manager.desconectar()
+            # Salva os dados em Parquet, evitando a ida e volta pelo xlsx
+            self.progresso.emit("Salvando dados...")
+            caminho_arquivo = self.pasta_saida / "instrumentos.parquet"
+            self.sharepoint_manager.salvar_dados_parquet(dados, caminho_arquivo)
             
             self.progresso.emit("Dados carregados com sucesso!")
             self.finalizado.emit(caminho_arquivo)
@@ -138,6 +167,8 @@ class MainWindow(QMainWindow):
         self.arquivo_excel: Optional[Path] = None
         self.pasta_saida: Optional[Path] = None
         self.thread: Optional[QThread] = None
+        # Mantido durante toda a execução para reaproveitar a sessão HTTP
+        self.sharepoint_manager: Optional[SharePointManager] = None
         
         # Configura a interface
         self._configurar_interface()
@@ -218,6 +249,18 @@ class MainWindow(QMainWindow):
     
     def carregar_dados_sharepoint(self):
         """Carrega os dados dos instrumentos do SharePoint."""
+        # Cria o gerenciador uma única vez, com as credenciais do ambiente/.env
+        if self.sharepoint_manager is None:
+            try:
+                self.sharepoint_manager = SharePointManager(
+                    SHAREPOINT_SITE_URL,
+                    SHAREPOINT_USERNAME,
+                    SHAREPOINT_PASSWORD
+                )
+            except ValueError as e:
+                QMessageBox.critical(self, "Erro", str(e))
+                return
+        
         # Configura a pasta de saída
         self.pasta_saida = Path.home() / "Documents" / "Instrumentos" / "output"
         self.pasta_saida.mkdir(parents=True, exist_ok=True)
@@ -236,9 +279,7 @@ class MainWindow(QMainWindow):
         
         # Cria e inicia a thread
         self.thread = CarregarDadosSharePointThread(
-            "http://10.1.1.82:1206",  # URL do SharePoint local
-            "kauam.barcellos",
-            "S!78576@a",
+            self.sharepoint_manager,
             self.pasta_saida
         )
         self.thread.progresso.connect(self.atualizar_progresso)
@@ -251,9 +292,9 @@ class MainWindow(QMainWindow):
         Finaliza o carregamento dos dados do SharePoint.
         
         Args:
-            caminho_arquivo: Caminho do arquivo Excel gerado.
+            caminho_arquivo: Caminho do arquivo Parquet gerado.
         """
-        # Atualiza o arquivo Excel
+        # Atualiza o arquivo de dados
         self.arquivo_excel = caminho_arquivo
         self.label_arquivo.setText(f"Arquivo: {self.arquivo_excel.name}")
         
@@ -284,7 +325,7 @@ class MainWindow(QMainWindow):
             self,
             "Selecionar Arquivo Excel",
             "",
-            "Arquivos Excel (*.xlsx *.xls)"
+            "Arquivos de dados (*.xlsx *.xls *.parquet)"
         )
         
         if arquivo:
@@ -371,7 +412,8 @@ class MainWindow(QMainWindow):
             self.arquivo_excel,
             self.pasta_saida,
             spg,
-            ensaio
+            ensaio,
+            self.data_manager
         )
         self.thread.progresso.connect(self.atualizar_progresso)
         self.thread.erro.connect(self.mostrar_erro)
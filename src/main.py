@@ -9,12 +9,14 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from PyQt6.QtWidgets import QApplication
 
-from src.gui.main_window import MainWindow
-
 
 def main():
     """Função principal da aplicação."""
     app = QApplication(sys.argv)
+    
+    # A janela (pandas, lxml, requests) é importada só depois de a aplicação existir
+    from src.gui.main_window import MainWindow
+    
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
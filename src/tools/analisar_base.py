@@ -3,76 +3,96 @@
 Script para analisar a base de dados de instrumentos.
 """
 import logging
-import json
-from datetime import datetime
-from typing import List, Dict, Any
-from src.database.repository import InstrumentoRepository
-from src.database.models import Instrumento
-from src.database.database import SessionLocal
+import ijson
+from typing import List, Dict, Any, Sequence, Tuple
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
 
+# Quantidade de linhas acumuladas antes de cada INSERT em lote
+TAMANHO_BLOCO = 5000
+
+def mapear_linha(inst: Dict[str, Any], campos_json: Sequence[Tuple[str, str]]) -> Dict[str, Any]:
+    """
+    Converte um instrumento do JSON para as colunas do modelo.
+    
+    A data de validade permanece como texto; ela é convertida por bloco em
+    converter_validades.
+    
+    Args:
+        inst: Dicionário do instrumento como salvo no JSON
+        campos_json: Pares (coluna, chave do JSON), normalmente CAMPOS_JSON
+        
+    Returns:
+        Dict[str, Any]: Linha da tabela de instrumentos
+    """
+    linha = {coluna: inst.get(campo) for coluna, campo in campos_json}
+    linha['validade_certificado'] = inst.get('ValidadeCertificado')
+    return linha
+
+def converter_validades(bloco: List[Dict[str, Any]]) -> None:
+    """
+    Converte as datas de validade de um bloco de linhas em uma única chamada vetorizada.
+    
+    Args:
+        bloco: Linhas geradas por mapear_linha, alteradas no próprio lugar
+    """
+    import pandas as pd
+    
+    textos = [linha['validade_certificado'] for linha in bloco]
+    datas = pd.to_datetime(textos, format='%Y-%m-%d', errors='coerce')
+    invalidas = datas.isna()
+    
+    for linha, texto, data, invalida in zip(bloco, textos, datas.date, invalidas):
+        if invalida:
+            # Vazio e '-' indicam ausência de data; o restante é inválido
+            if texto and texto != '-':
+                logger.warning(f"Data de validade inválida para o instrumento {linha['nome']}: {texto}")
+            linha['validade_certificado'] = None
+        else:
+            linha['validade_certificado'] = data
+
 def main():
     """Função principal."""
     try:
         logger.info("Iniciando análise da base de dados...")
         
-        # Criar sessão do banco de dados
-        db = SessionLocal()
-        try:
-            # Criar repositório com a sessão
-            repo = InstrumentoRepository(db)
-            
-            # Carregar dados do JSON mais recente
-            with open("data/json/instrumentos.json", "r", encoding="utf-8") as f:
-                instrumentos = json.load(f)
+        with open("data/json/instrumentos.json", "rb") as f:
+            # SQLAlchemy só é importado depois de o arquivo estar disponível
+            from src.database.database import SessionLocal
+            from src.database.repository import CAMPOS_JSON, InstrumentoRepository
             
-            logger.info(f"Carregados {len(instrumentos)} instrumentos do JSON")
-            
-            # Converte os dados para objetos do modelo
-            instrumentos_db = []
-            for inst in instrumentos:
-                # Converte a data de validade se existir
-                validade = None
-                if inst.get('ValidadeCertificado') and inst.get('ValidadeCertificado') != '-':
-                    try:
-                        # Tenta converter a data ISO 8601 para objeto date
-                        validade = datetime.strptime(inst['ValidadeCertificado'], '%Y-%m-%d').date()
-                    except ValueError as e:
-                        logger.warning(f"Data de validade inválida para o instrumento {inst.get('Instrumento')}: {inst.get('ValidadeCertificado')}")
+            # Criar sessão do banco de dados
+            db = SessionLocal()
+            try:
+                # Criar repositório com a sessão
+                repo = InstrumentoRepository(db)
                 
-                # Cria instância do modelo Instrumento
-                instrumento = Instrumento(
-                    spg=inst.get('SPG'),
-                    ensaio=inst.get('Ensaio'),
-                    nome=inst.get('Instrumento'),
-                    tipo=inst.get('Tipo'),
-                    marca=inst.get('Marca'),
-                    modelo=inst.get('Modelo'),
-                    numero_serie=inst.get('Número de Série'),
-                    localizacao=inst.get('Localização'),
-                    faixa=inst.get('Faixa'),
-                    unidade=inst.get('Unidade'),
-                    status=inst.get('Status'),
-                    classe=inst.get('Classe'),
-                    certificado=inst.get('Certificado'),
-                    descricao=inst.get('Descrição'),
-                    validade_certificado=validade,
-                    criterio_aceitacao=inst.get('CriterioAceitacao'),
-                    intervalo_operacao=inst.get('IntervaloOperacao')
-                )
-                instrumentos_db.append(instrumento)
-            
-            # Salva os instrumentos no banco de dados
-            logger.info("Iniciando salvamento em massa...")
-            repo.criar_em_massa(instrumentos_db)
-            
-            logger.info("Dados salvos com sucesso!")
-            
-        finally:
-            # Sempre fecha a sessão
-            db.close()
+                # Lê o JSON de forma incremental e salva em blocos, tudo
+                # dentro de uma única transação
+                logger.info("Iniciando salvamento em massa...")
+                total = 0
+                bloco = []
+                with db.begin():
+                    for inst in ijson.items(f, "item", use_float=True):
+                        bloco.append(mapear_linha(inst, CAMPOS_JSON))
+                        if len(bloco) >= TAMANHO_BLOCO:
+                            converter_validades(bloco)
+                            repo.criar_em_massa(bloco, commit=False)
+                            total += len(bloco)
+                            bloco.clear()
+                    
+                    if bloco:
+                        converter_validades(bloco)
+                        repo.criar_em_massa(bloco, commit=False)
+                        total += len(bloco)
+                
+                logger.info(f"Carregados {total} instrumentos do JSON")
+                logger.info("Dados salvos com sucesso!")
+                
+            finally:
+                # Sempre fecha a sessão
+                db.close()
             
     except Exception as e:
         logger.error(f"Erro ao analisar base: {str(e)}")
@@ -3,15 +3,12 @@
 Script para gerenciar a base de dados de instrumentos.
 """
 import logging
-import json
+import mmap
+import orjson
 import os
 import time
 from datetime import datetime
 from typing import List, Dict, Any
-from src.database.repository import InstrumentoRepository
-from src.database.models import Instrumento
-from src.database.database import SessionLocal
-from src.database.init_db import init_db
 
 # Configuração de logging
 logger = logging.getLogger(__name__)
@@ -30,6 +27,21 @@ def limpar_arquivo_log(caminho_arquivo):
     except Exception as e:
         print(f"❌ Erro ao limpar arquivo de log: {e}")
 
+def carregar_json(caminho_arquivo: str) -> List[Dict[str, Any]]:
+    """
+    Carrega o arquivo JSON mapeando-o em memória, sem passar pela camada de texto.
+    
+    Args:
+        caminho_arquivo: Caminho do arquivo JSON
+        
+    Returns:
+        List[Dict[str, Any]]: Instrumentos contidos no arquivo
+    """
+    with open(caminho_arquivo, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # A view precisa ser liberada antes de o mapeamento ser fechado
+        with memoryview(mm) as conteudo:
+            return orjson.loads(conteudo)
+
 def configurar_logging():
     """Configura o sistema de logging para salvar em arquivo e console."""
     # Caminho do arquivo de log
@@ -78,8 +90,17 @@ def main():
         logger.info("=" * 50)
         
         # Inicializa o banco de dados se necessário
+        # SQLAlchemy e os modelos só são importados quando realmente usados
+        from sqlalchemy import inspect
+        from src.database.database import SessionLocal, criar_indices, engine
+        from src.database.init_db import init_db
+        from src.database.models import Instrumento
+        from src.database.repository import InstrumentoRepository
+        
+        # Na primeira carga a tabela é criada sem índices, montados após a inserção
         logger.info("🔍 Verificando banco de dados...")
-        init_db()
+        primeira_carga = not inspect(engine).has_table(Instrumento.__tablename__)
+        init_db(with_indexes=not primeira_carga)
         logger.info("✅ Banco de dados verificado com sucesso!")
         
         # Criar sessão do banco de dados
@@ -90,8 +111,7 @@ def main():
             
             # Carregar dados do JSON mais recente
             logger.info("📂 Carregando dados do arquivo JSON...")
-            with open("data/json/instrumentos.json", "r", encoding="utf-8") as f:
-                instrumentos = json.load(f)
+            instrumentos = carregar_json("data/json/instrumentos.json")
             
             logger.info(f"📊 Carregados {len(instrumentos)} instrumentos do JSON")
             
@@ -99,6 +119,10 @@ def main():
             logger.info("🔄 Iniciando sincronização de dados...")
             estatisticas = repo.sincronizar_dados(instrumentos)
             
+            if primeira_carga:
+                logger.info("🗂️ Criando índices após a carga inicial...")
+                criar_indices()
+            
             # Calcular tempo de execução
             tempo_execucao = time.time() - tempo_inicio
             
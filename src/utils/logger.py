@@ -1,11 +1,98 @@
 """
 Módulo de configuração de logging.
 """
+import atexit
 import logging
 import os
-from datetime import datetime
+import queue
+import sys
+import threading
+import time
+from logging.handlers import MemoryHandler, QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
 
+# Registros acumulados antes de cada gravação em lote no arquivo de log
+CAPACIDADE_BUFFER_LOG = 512
+
+# Tamanho do buffer do arquivo de log, em bytes
+TAMANHO_BUFFER_ARQUIVO = 64 * 1024
+
+class _FormatterCacheado(logging.Formatter):
+    """Formatter que formata a data uma vez por segundo e reaproveita o texto."""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # (segundo, texto) trocados juntos, para leituras consistentes entre threads
+        self._cache_data = (None, '')
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        segundo = int(record.created)
+        ultimo_segundo, texto = self._cache_data
+        if segundo != ultimo_segundo:
+            texto = time.strftime(datefmt or self.default_time_format, self.converter(segundo))
+            self._cache_data = (segundo, texto)
+        return texto
+
+
+# Formato compartilhado por todos os handlers; a data explícita dispensa os milissegundos
+_FORMATTER = _FormatterCacheado(
+    '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%dT%H:%M:%S'
+)
+
+# Garante que a configuração dos handlers aconteça uma única vez
+_lock_configuracao = threading.Lock()
+
+def _nome_arquivo_rotacionado(nome_padrao: str) -> str:
+    """Converte 'logs/instrumentos.log.20240131' em 'logs/instrumentos_20240131.log'."""
+    base, data = nome_padrao.rsplit('.', 1)
+    raiz, extensao = os.path.splitext(base)
+    return f"{raiz}_{data}{extensao}"
+
+class _ArquivoLogBufferizado(TimedRotatingFileHandler):
+    """
+    Arquivo de log com rotação à meia-noite e buffer grande, sem descarregar
+    o arquivo a cada registro.
+    """
+    
+    def __init__(self, filename: Path, buffering: int = TAMANHO_BUFFER_ARQUIVO):
+        self._buffering = buffering
+        super().__init__(filename, when='midnight', encoding='utf-8', delay=True)
+        # Arquivos dos dias anteriores mantêm o nome instrumentos_AAAAMMDD.log
+        self.suffix = '%Y%m%d'
+        self.namer = _nome_arquivo_rotacionado
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=self._buffering, encoding=self.encoding)
+    
+    def emit(self, record: logging.LogRecord) -> None:
+        # O mesmo que BaseRotatingHandler.emit, mas o flush fica a cargo do lote
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+        except Exception:
+            self.handleError(record)
+            return
+        
+        if self.stream is None:
+            self.stream = self._open()
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _BufferLog(MemoryHandler):
+    """MemoryHandler que descarrega também o arquivo de destino a cada lote."""
+    
+    def flush(self) -> None:
+        super().flush()
+        if self.target is not None:
+            self.target.flush()
+
+
 def setup_logger(
     level: int = logging.INFO,
     log_file: bool = True,
@@ -14,6 +101,21 @@ def setup_logger(
     """
     Configura e retorna um logger.
     
+    Os handlers de console e arquivo rodam em uma thread própria (QueueListener);
+    quem registra a mensagem apenas a coloca em uma fila em memória.
+    
+    Os handlers são criados apenas na primeira chamada; as seguintes só
+    ajustam o nível e devolvem o mesmo logger.
+    
+    Passe os argumentos da mensagem separados, para que a formatação só
+    aconteça se o registro passar pelo filtro de nível::
+    
+        logger.info("Instrumentos carregados: %s", total)      # correto
+        logger.info(f"Instrumentos carregados: {total}")       # evitar
+    
+    Para mensagens caras de montar, consulte
+    ``logger.isEnabledFor(logging.DEBUG)`` antes.
+    
     Args:
         level: Nível de logging (default: logging.INFO)
         log_file: Se True, salva logs em arquivo (default: True)
@@ -22,20 +124,47 @@ def setup_logger(
     Returns:
         Logger configurado
     """
-    # Criar logger
-    logger = logging.getLogger('instrumentos')
-    logger.setLevel(level)
+    with _lock_configuracao:
+        # O formato usado não inclui thread nem processo: não coleta esses dados
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+        # Nem arquivo/linha de origem: evita percorrer a pilha em cada registro
+        logging._srcfile = None
+        
+        # Criar logger
+        logger = logging.getLogger('instrumentos')
+        logger.setLevel(level)
+        
+        # Já configurado: não duplica handlers nem arquivos abertos
+        if getattr(logger, '_listener', None) is not None:
+            return logger
+        
+        return _configurar_handlers(logger, log_file, console)
+
+def _configurar_handlers(logger: logging.Logger, log_file: bool, console: bool) -> logging.Logger:
+    """
+    Cria os handlers de console e arquivo e os liga ao logger por uma fila.
     
-    # Formato do log
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    Args:
+        logger: Logger a ser configurado
+        log_file: Se True, salva logs em arquivo
+        console: Se True, exibe logs no console
+        
+    Returns:
+        O próprio logger
+    """
+    # Handlers que efetivamente escrevem, acionados pela thread do listener
+    handlers = []
     
     # Adicionar handler de console se solicitado
-    if console:
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+    # (sem console, como no executável com janela, sys.stderr é None)
+    if console and sys.stderr is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        # DEBUG nunca chega ao console, mesmo com o logger em nível DEBUG
+        console_handler.setLevel(logging.INFO)
+        console_handler.setFormatter(_FORMATTER)
+        handlers.append(console_handler)
     
     # Adicionar handler de arquivo se solicitado
     if log_file:
@@ -43,13 +172,34 @@ def setup_logger(
         log_dir = Path('logs')
         log_dir.mkdir(exist_ok=True)
         
-        # Nome do arquivo de log com data
-        data_atual = datetime.now().strftime('%Y%m%d')
-        log_file = log_dir / f'instrumentos_{data_atual}.log'
+        # Configurar handler de arquivo (um arquivo por dia, trocado à meia-noite)
+        file_handler = _ArquivoLogBufferizado(log_dir / 'instrumentos.log')
+        file_handler.setFormatter(_FORMATTER)
+        
+        # Grava em lotes; erros descarregam o buffer imediatamente
+        buffered = _BufferLog(
+            capacity=CAPACIDADE_BUFFER_LOG,
+            flushLevel=logging.ERROR,
+            target=file_handler,
+            flushOnClose=True
+        )
+        handlers.append(buffered)
+        
+        # Registrado antes do listener: roda depois dele, já com a fila vazia
+        atexit.register(buffered.flush)
+    
+    if handlers:
+        # Fila sem limite: o registro nunca bloqueia quem chama o logger
+        fila = queue.Queue(-1)
+        listener = QueueListener(fila, *handlers, respect_handler_level=True)
+        listener.start()
+        logger.addHandler(QueueHandler(fila))
+        
+        # Os handlers próprios bastam: não repassa os registros ao logger raiz
+        logger.propagate = False
         
-        # Configurar handler de arquivo
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        # Esvazia a fila e fecha os arquivos ao encerrar o processo
+        logger._listener = listener
+        atexit.register(listener.stop)
     
     return logger 
\ No newline at end of file
@@ -0,0 +1,41 @@
+"""
+Configuração compartilhada dos testes.
+"""
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# Banco temporário: definido antes de qualquer import de src.database, que cria
+# o engine a partir de DATABASE_URL no momento da importação
+_DIR_BANCO = tempfile.mkdtemp(prefix="instrumentos-testes-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_DIR_BANCO) / 'testes.db'}"
+
+# Permite importar o pacote src sem instalá-lo
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def db():
+    """Sessão de banco de dados sobre tabelas recriadas a cada teste."""
+    from src.database.database import SessionLocal, engine, init_db
+    from src.database.models import Base
+
+    init_db()
+    sessao = SessionLocal()
+    try:
+        yield sessao
+    finally:
+        sessao.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """Remove o banco temporário ao final da execução."""
+    from src.database.database import engine
+
+    engine.dispose()
+    shutil.rmtree(_DIR_BANCO, ignore_errors=True)
@@ -0,0 +1,49 @@
+"""
+Testes do DataManager.
+"""
+import os
+
+import pandas as pd
+import pytest
+
+from src.core.data_manager import COLUNAS_ENTRADA, DataManager
+
+
+def _linha(**valores):
+    """Linha com todas as colunas de entrada preenchidas."""
+    linha = dict.fromkeys(COLUNAS_ENTRADA, "x")
+    linha.update({"Última Calibração": "2024-01-10", "Próxima Calibração": "2025-01-10"})
+    linha.update(valores)
+    return linha
+
+
+def test_carga_com_erro_mantem_dados_anteriores(tmp_path):
+    valido = tmp_path / "valido.xlsx"
+    pd.DataFrame([_linha(SPG="SPG-1")]).to_excel(valido, index=False)
+    invalido = tmp_path / "invalido.xlsx"
+    pd.DataFrame([{"SPG": "SPG-2"}]).to_excel(invalido, index=False)
+
+    manager = DataManager()
+    dados = manager.carregar_dados(valido)
+
+    with pytest.raises(ValueError, match="Colunas necessárias"):
+        manager.carregar_dados(invalido)
+
+    assert manager.dados is dados
+    assert manager.obter_spgs() == ["SPG-1"]
+    assert manager.possui_dados_de(valido)
+    assert not manager.possui_dados_de(invalido)
+
+
+def test_possui_dados_de_detecta_arquivo_alterado(tmp_path):
+    arquivo = tmp_path / "dados.xlsx"
+    pd.DataFrame([_linha()]).to_excel(arquivo, index=False)
+
+    manager = DataManager()
+    assert not manager.possui_dados_de(arquivo)
+    manager.carregar_dados(arquivo)
+    assert manager.possui_dados_de(arquivo)
+
+    estado = arquivo.stat()
+    os.utime(arquivo, ns=(estado.st_atime_ns, estado.st_mtime_ns + 1_000_000_000))
+    assert not manager.possui_dados_de(arquivo)
@@ -0,0 +1,28 @@
+"""
+Testes do InstrumentoRepository.
+"""
+from src.database.repository import InstrumentoRepository
+
+
+def test_salvar_em_massa_atualiza_objetos_ja_carregados(db):
+    repo = InstrumentoRepository(db)
+    repo.salvar_em_massa([{"nome": "original", "tipo": "Manômetro"}])
+    instrumento = repo.obter_por_id(1)
+    assert instrumento.nome == "original"
+
+    repo.salvar_em_massa([{"id": 1, "nome": "bulk"}])
+
+    # Mesma sessão: a leitura não pode devolver o objeto desatualizado
+    assert repo.obter_por_id(1).nome == "bulk"
+    assert instrumento.nome == "bulk"
+
+
+def test_sincronizar_dados_atualiza_objetos_ja_carregados(db):
+    repo = InstrumentoRepository(db)
+    repo.salvar_em_massa([{"nome": "PT-01", "tipo": "Manômetro"}])
+    assert repo.obter_por_id(1).tipo == "Manômetro"
+
+    estatisticas = repo.sincronizar_dados([{"Instrumento": "PT-01", "Tipo": "Transmissor"}])
+
+    assert estatisticas["atualizados"] == 1
+    assert repo.obter_por_id(1).tipo == "Transmissor"
@@ -0,0 +1,76 @@
+"""
+Testes do SharePointManager que não dependem de acesso à rede.
+"""
+import pandas as pd
+import pytest
+
+from src.core.sharepoint_manager import SharePointManager
+
+
+@pytest.fixture
+def manager():
+    """Gerenciador sem conexão, usado apenas no processamento dos dados."""
+    return SharePointManager("https://sharepoint.exemplo", "usuario", "senha")
+
+
+def test_processar_mantem_none_como_texto(manager):
+    dados = [{"name": "PT-01", "type": "Manômetro", "brand": None}]
+
+    assert manager._processar_dados_instrumentos(dados) == [
+        {"Instrumento": "PT-01", "Tipo": "Manômetro", "Marca": "None"}
+    ]
+
+
+def test_processar_nao_descarta_nome_none(manager):
+    dados = [{"name": None, "type": "Manômetro"}]
+
+    assert manager._processar_dados_instrumentos(dados) == [
+        {"Instrumento": "None", "Tipo": "Manômetro"}
+    ]
+
+
+@pytest.mark.parametrize("status, esperado", [
+    (True, "Ativo"), (1, "Ativo"), (1.0, "Ativo"),
+    (False, "Bloqueado"), (0, "Bloqueado"),
+])
+def test_processar_status_do_sensor(manager, status, esperado):
+    dados = [{"name": "PT-01", "type": "Manômetro", "sensor_status": status}]
+
+    assert manager._processar_dados_instrumentos(dados)[0]["Status"] == esperado
+
+
+def test_processar_campos_ausentes_e_obrigatorios(manager):
+    dados = [
+        {"name": "PT-01", "type": "Manômetro", "exp_name": "[SPG0121] Ensaio 102", "sensor_status": 2},
+        {"name": "PT-02"},
+        {"name": "-", "type": "Manômetro"},
+    ]
+
+    assert manager._processar_dados_instrumentos(dados) == [
+        {"SPG": "SPG0121", "Ensaio": "Ensaio 102", "Instrumento": "PT-01", "Tipo": "Manômetro"}
+    ]
+
+
+def test_parquet_salvo_pode_ser_carregado_pelo_data_manager(manager, tmp_path):
+    from src.core.data_manager import DataManager
+
+    dados = manager._processar_dados_instrumentos([
+        {
+            "name": "PT-01", "type": "Manômetro", "serial_num": "NS-123",
+            "location": "Bancada 1", "range": "0-10 bar", "sensor_status": 1,
+            "exp_name": "[SPG0121] Ensaio 102", "certif_end_date": "2025-03-05",
+        },
+        {"name": "TT-02", "type": "Termômetro", "exp_name": "[SPG0121] Ensaio 102"},
+    ])
+    caminho = tmp_path / "instrumentos.parquet"
+    manager.salvar_dados_parquet(dados, caminho)
+
+    data_manager = DataManager()
+    carregados = data_manager.carregar_dados(caminho)
+
+    assert list(carregados["Instrumento"]) == ["PT-01", "TT-02"]
+    assert carregados.loc[0, "Tag"] == "NS-123"
+    assert carregados.loc[0, "Próxima Calibração"] == pd.Timestamp("2025-03-05")
+    assert carregados["Última Calibração"].isna().all()
+    assert data_manager.obter_spgs() == ["SPG0121"]
+    assert data_manager.obter_ensaios("SPG0121") == ["Ensaio 102"]